@@ -1,9 +1,35 @@
+import csv
+import io
 import pandas as pd
 from datetime import datetime
 from load.base_loader import BaseLoader
 from utils.db_utils import get_target_engine, execute_sql
 from utils.logger import logger
 
+COPY_CHUNKSIZE = 10_000
+
+
+def copy_insert(table, conn, keys, data_iter):
+    """
+    pandas.to_sql insertion method that streams each chunk through Postgres COPY FROM STDIN
+    instead of one INSERT per row. Returns the number of rows written.
+    None is written as \\N so NULLs and empty strings stay distinct.
+    """
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    rows = 0
+    for row in data_iter:
+        writer.writerow(r"\N" if v is None else v for v in row)
+        rows += 1
+    buf.seek(0)
+
+    columns = ", ".join(f'"{k}"' for k in keys)
+    target = f'"{table.schema}"."{table.name}"' if table.schema else f'"{table.name}"'
+    with conn.connection.cursor() as cur:
+        cur.copy_expert(f"COPY {target} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buf)
+    return rows
+
+
 class DatabaseLoader(BaseLoader):
     """Load transformed data to target database"""
     
@@ -44,7 +70,9 @@ class DatabaseLoader(BaseLoader):
                 self.engine, 
                 schema='quality', 
                 if_exists='append', 
-                index=False
+                index=False,
+                method=copy_insert,
+                chunksize=COPY_CHUNKSIZE
             )
             logger.info(f"Loaded {len(df)} records to staging table")
             return len(df)
@@ -63,13 +91,15 @@ class DatabaseLoader(BaseLoader):
             logger.info(f"Loading DataFrame with columns: {df.columns.tolist()}")
             logger.info(f"DataFrame shape: {df.shape}")
             
-            # Use simple to_sql without method='multi'
+            # COPY per 10k-row chunk (no bind-parameter limit, unlike method='multi')
             records_loaded = df.to_sql(
                 'clean_quality_data', 
                 self.engine, 
                 schema='quality', 
                 if_exists='append', 
-                index=False
+                index=False,
+                method=copy_insert,
+                chunksize=COPY_CHUNKSIZE
             )
             
             logger.info(f"Loaded {records_loaded} records to clean table")
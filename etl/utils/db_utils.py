@@ -25,8 +25,8 @@ def get_source_engine():
     url = f"postgresql+psycopg2://{user}:{password}@{host}:{port}/{dbname}"
     return create_engine(url, connect_args={"client_encoding": "utf8"})
 
-def get_target_engine():
-    """Get target database engine"""
+def get_target_engine(**engine_kwargs):
+    """Get target database engine (extra keyword args go to create_engine, e.g. pool settings)"""
     config = load_db_config()
     db_config = config['target_db']
     
@@ -37,7 +37,7 @@ def get_target_engine():
     dbname = db_config['dbname']
     
     url = f"postgresql+psycopg2://{user}:{password}@{host}:{port}/{dbname}"
-    return create_engine(url, connect_args={"client_encoding": "utf8"})
+    return create_engine(url, connect_args={"client_encoding": "utf8"}, **engine_kwargs)
 
 def execute_sql(engine, query, params=None):
     """Execute SQL query with parameters"""
@@ -91,11 +91,81 @@ def init_database():
         conn.execute(text("CREATE INDEX IF NOT EXISTS idx_clean_date ON quality.clean_quality_data(date);"))
         conn.execute(text("CREATE INDEX IF NOT EXISTS idx_clean_part_shift ON quality.clean_quality_data(part_number, shift, date);"))
         conn.execute(text("CREATE INDEX IF NOT EXISTS idx_clean_disposition ON quality.clean_quality_data(disposition, date);"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS idx_clean_disposition_upper ON quality.clean_quality_data((UPPER(disposition)), date);"))
+        # Time-window scans used by the dashboard: BRIN on the append-ordered date
+        # column, plus covering indexes for the defect/operator group-bys.
+        conn.execute(text("CREATE INDEX IF NOT EXISTS brin_clean_date ON quality.clean_quality_data USING BRIN(date);"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS idx_clean_code_date ON quality.clean_quality_data(code_description, date) INCLUDE (disposition);"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS idx_clean_operator_date ON quality.clean_quality_data(who_made_it, date) INCLUDE (disposition);"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS idx_clean_date_disposition ON quality.clean_quality_data(date) INCLUDE (disposition);"))
         conn.execute(text("CREATE INDEX IF NOT EXISTS idx_stg_processed ON quality.stg_quality_data(is_processed);"))
 
+        # Pre-aggregated views for the dashboard (refresh nightly: scripts/refresh_materialized_views.py)
+        conn.execute(text("""
+            CREATE MATERIALIZED VIEW IF NOT EXISTS quality.mv_monthly_operator_defects AS
+            SELECT
+                DATE_TRUNC('month', date)::date AS month,
+                who_made_it AS operator_id,
+                COUNT(*) AS defect_count,
+                COUNT(*) FILTER (WHERE UPPER(disposition) = 'SCRAP') AS scrap_count
+            FROM quality.clean_quality_data
+            WHERE who_made_it IS NOT NULL
+            GROUP BY 1, 2;
+        """))
+        conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_monthly_operator ON quality.mv_monthly_operator_defects(month, operator_id);"))
+
+        conn.execute(text("""
+            CREATE MATERIALIZED VIEW IF NOT EXISTS quality.mv_daily_defects AS
+            SELECT
+                date::date AS day,
+                COUNT(*) AS total_defects,
+                COUNT(*) FILTER (WHERE UPPER(disposition) = 'SCRAP') AS scrap_count
+            FROM quality.clean_quality_data
+            GROUP BY 1;
+        """))
+        conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_daily_defects ON quality.mv_daily_defects(day);"))
+
+        conn.execute(text("""
+            CREATE MATERIALIZED VIEW IF NOT EXISTS quality.mv_defect_rollup AS
+            SELECT
+                defect,
+                defect_count,
+                scrap_count,
+                -- scrap-rate severity band (0 low .. 3 critical), same 20/40/70 thresholds as the dashboard
+                CASE
+                    WHEN scrap_rate >= 70 THEN 3
+                    WHEN scrap_rate >= 40 THEN 2
+                    WHEN scrap_rate >= 20 THEN 1
+                    ELSE 0
+                END::smallint AS severity
+            FROM (
+                SELECT
+                    defect,
+                    defect_count,
+                    scrap_count,
+                    ROUND(100.0 * scrap_count / defect_count, 1) AS scrap_rate
+                FROM (
+                    SELECT
+                        code_description AS defect,
+                        COUNT(*) AS defect_count,
+                        COUNT(*) FILTER (WHERE UPPER(disposition) = 'SCRAP') AS scrap_count
+                    FROM quality.clean_quality_data
+                    WHERE code_description IS NOT NULL AND code_description != ''
+                    GROUP BY 1
+                ) counts
+            ) rated;
+        """))
+        conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_defect_rollup ON quality.mv_defect_rollup(defect);"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS idx_mv_defect_rollup_count ON quality.mv_defect_rollup(defect_count DESC);"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS idx_mv_defect_rollup_severity ON quality.mv_defect_rollup(severity DESC, defect_count DESC);"))
+
         conn.commit()  # <-- Important: commit changes
 
-        logger.info("✅ Database initialized successfully!")
+    # VACUUM cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE quality.clean_quality_data;"))
+
+    logger.info("✅ Database initialized successfully!")
 
 
 if __name__ == "__main__":
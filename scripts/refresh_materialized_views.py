@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Refresh the dashboard materialized views created by init_database.py.
+Schedule nightly after the ETL runs, e.g. cron: 30 2 * * * python scripts/refresh_materialized_views.py
+"""
+import sys
+import os
+from sqlalchemy import text
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from etl.utils.db_utils import get_target_engine
+from etl.utils.logger import logger
+
+MATERIALIZED_VIEWS = [
+    "quality.mv_monthly_operator_defects",
+    "quality.mv_daily_defects",
+    "quality.mv_defect_rollup",
+]
+
+
+def refresh_materialized_views():
+    """Refresh each view CONCURRENTLY so dashboard reads are not blocked."""
+    engine = get_target_engine()
+    with engine.connect() as conn:
+        for view in MATERIALIZED_VIEWS:
+            conn.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view};"))
+            logger.info(f"Refreshed {view}")
+        conn.commit()
+
+
+if __name__ == "__main__":
+    logger.info("=== Refreshing materialized views ===")
+    refresh_materialized_views()
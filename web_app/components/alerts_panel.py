@@ -1,6 +1,8 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
-from web_app.utils.calculations import two_prop_z_test
+from web_app.utils.calculations import two_prop_z_test_arrays
+from web_app.utils.export_utils import to_csv_bytes
 
 def alerts_panel(agg_df, rel_thresh=0.5, abs_thresh=0.05, alpha=0.05):
     """
@@ -20,47 +22,48 @@ def alerts_panel(agg_df, rel_thresh=0.5, abs_thresh=0.05, alpha=0.05):
     agg_df = agg_df.copy()
     agg_df['abs_delta'] = agg_df['rate_curr'] - agg_df['rate_prior']
     # safe relative delta: if prior==0 and curr>0 -> inf, if both 0 -> 0
-    def rel_delta_row(r):
-        if r['rate_prior'] == 0:
-            return float('inf') if r['rate_curr'] > 0 else 0.0
-        return (r['rate_curr'] / r['rate_prior']) - 1
-    agg_df['rel_delta'] = agg_df.apply(rel_delta_row, axis=1)
+    curr = agg_df['rate_curr'].to_numpy(dtype=np.float64)
+    prior = agg_df['rate_prior'].to_numpy(dtype=np.float64)
+    rel_delta = np.where(curr > 0, np.inf, 0.0)
+    np.divide(curr, prior, out=rel_delta, where=prior != 0)
+    agg_df['rel_delta'] = np.where(prior != 0, rel_delta - 1, rel_delta)
 
-    alerts = []
-    for _, row in agg_df.iterrows():
-        total_curr = int(row.get('total_curr', 0))
-        total_prior = int(row.get('total_prior', 0))
-        scrap_curr = int(row.get('scrap_curr', 0))
-        scrap_prior = int(row.get('scrap_prior', 0))
+    counts = {
+        col: (agg_df[col] if col in agg_df.columns else pd.Series(0, index=agg_df.index)).fillna(0).astype('int64')
+        for col in ('total_curr', 'total_prior', 'scrap_curr', 'scrap_prior')
+    }
+    # only meaningful when both windows have enough observations; z-tests run for all candidates in one call
+    triggered = (
+        (counts['total_curr'] >= 10) & (counts['total_prior'] >= 10)
+        & ((agg_df['rel_delta'] >= rel_thresh) | (agg_df['abs_delta'] >= abs_thresh))
+    ).to_numpy()
+    cand = agg_df[triggered]
+    z, p = two_prop_z_test_arrays(
+        counts['scrap_curr'][triggered], counts['total_curr'][triggered],
+        counts['scrap_prior'][triggered], counts['total_prior'][triggered],
+    )
+    rel = cand['rel_delta'].to_numpy(dtype=np.float64)
 
-        # only meaningful when both windows have enough observations
-        if total_curr >= 10 and total_prior >= 10:
-            z, p = two_prop_z_test(scrap_curr, total_curr, scrap_prior, total_prior)
-            triggered = (row['rel_delta'] >= rel_thresh) or (row['abs_delta'] >= abs_thresh)
-            signif = (p is not None and p < alpha)
-            if triggered:
-                alerts.append({
-                    'part_number': row['part_number'],
-                    'total_curr': total_curr,
-                    'scrap_curr': scrap_curr,
-                    'rate_curr_pct': round(row['rate_curr'] * 100, 2),
-                    'total_prior': total_prior,
-                    'scrap_prior': scrap_prior,
-                    'rate_prior_pct': round(row['rate_prior'] * 100, 2),
-                    'abs_delta_pp': round(row['abs_delta'] * 100, 2),
-                    'rel_delta_pct': round(row['rel_delta'] * 100, 1) if row['rel_delta'] != float('inf') else 9999.0,
-                    'z': round(z, 3) if z is not None else None,
-                    'p_value': round(p, 4) if p is not None else None,
-                    'significant': signif
-                })
-
-    alerts_df = pd.DataFrame(alerts)
-    st.write("RAW ALERT DATA:", alerts)
+    alerts_df = pd.DataFrame({
+        'part_number': cand['part_number'].to_numpy(),
+        'total_curr': counts['total_curr'][triggered].to_numpy(),
+        'scrap_curr': counts['scrap_curr'][triggered].to_numpy(),
+        'rate_curr_pct': (cand['rate_curr'].to_numpy(dtype=np.float64) * 100).round(2),
+        'total_prior': counts['total_prior'][triggered].to_numpy(),
+        'scrap_prior': counts['scrap_prior'][triggered].to_numpy(),
+        'rate_prior_pct': (cand['rate_prior'].to_numpy(dtype=np.float64) * 100).round(2),
+        'abs_delta_pp': (cand['abs_delta'].to_numpy(dtype=np.float64) * 100).round(2),
+        'rel_delta_pct': np.where(np.isinf(rel), 9999.0, (rel * 100).round(1)),
+        # NaN (untestable) becomes None, as before
+        'z': pd.Series(z.round(3), dtype=object).where(~np.isnan(z), None),
+        'p_value': pd.Series(p.round(4), dtype=object).where(~np.isnan(p), None),
+        'significant': ~np.isnan(p) & (p < alpha),
+    })
     if alerts_df.empty:
         st.success("✅ No alerts triggered for the selected thresholds")
     else:
         st.info(f"Showing alerts where p < {alpha}, relative ≥ {rel_thresh*100}% or absolute ≥ {abs_thresh*100} pp.")
         alerts_df = alerts_df.sort_values('abs_delta_pp', ascending=False).reset_index(drop=True)
         st.dataframe(alerts_df, use_container_width=True)
-        csv = alerts_df.to_csv(index=False)
+        csv = to_csv_bytes(alerts_df)
         st.download_button('📥 Download Alerts CSV', csv, file_name='quality_alerts.csv')
\ No newline at end of file
@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+from functools import partial
 from typing import Optional
 
 
@@ -47,16 +48,13 @@ class QualityApp:
 
         # Derive current and prior totals from part aggregates if available
         if part_agg_df is not None and not part_agg_df.empty:
-            total = int(part_agg_df['total_curr'].sum()) if 'total_curr' in part_agg_df.columns else 0
-            scrap = int(part_agg_df['scrap_curr'].sum()) if 'scrap_curr' in part_agg_df.columns else 0
-            repaired = int(part_agg_df['repaired_curr'].sum()) if 'repaired_curr' in part_agg_df.columns else 0
-            prior_total = int(part_agg_df['total_prior'].sum()) if 'total_prior' in part_agg_df.columns else 0
-            prior_scrap = int(part_agg_df['scrap_prior'].sum()) if 'scrap_prior' in part_agg_df.columns else 0
+            # one column-wise reduction for all present totals (missing columns count as 0)
+            sums = part_agg_df.reindex(columns=['total_curr', 'scrap_curr', 'repaired_curr', 'total_prior', 'scrap_prior']).sum()
+            total, scrap, repaired, prior_total, prior_scrap = (int(v) for v in sums)
         else:
             # Fallback to daily aggregates
-            total = int(daily_df['defect_count'].sum()) if (daily_df is not None and 'defect_count' in daily_df.columns and not daily_df.empty) else 0
-            scrap = int(daily_df['scrap_count'].sum()) if (daily_df is not None and 'scrap_count' in daily_df.columns and not daily_df.empty) else 0
-            repaired = int(daily_df['repaired_count'].sum()) if (daily_df is not None and 'repaired_count' in daily_df.columns and not daily_df.empty) else 0
+            sums = daily_df.reindex(columns=['defect_count', 'scrap_count', 'repaired_count']).sum()
+            total, scrap, repaired = (int(v) for v in sums)
             prior_total = 0
             prior_scrap = 0
 
@@ -121,7 +119,7 @@ class QualityApp:
 
         # Validate engine early
         if not self.is_db_engine(self.engine) and not isinstance(self.engine, pd.DataFrame):
-            st.error(f"Expected SQLAlchemy engine/connection or pandas.DataFrame but got {type(self.engine)}. Aborting early. Check get_target_engine().")
+            st.error(f"Expected SQLAlchemy engine/connection or pandas.DataFrame but got {type(self.engine)}. Aborting early. Check get_dashboard_engine().")
             return
 
         # Lazy imports to avoid circular import issues
@@ -135,7 +133,8 @@ class QualityApp:
             # Fallback to legacy loader if present
             try:
                 from utils.data_loader import load_data  # type: ignore
-                legacy_load_data = load_data
+                # the per-part/daily fallback only reads these three columns
+                legacy_load_data = partial(load_data, columns=("date", "part_number", "disposition"))
                 load_agg_by_part = None
                 load_agg_by_day = None
             except Exception:
@@ -229,7 +228,8 @@ class QualityApp:
                         part_agg = pd.DataFrame()
                         daily_agg = pd.DataFrame()
                     else:
-                        raw['date'] = pd.to_datetime(raw['date'], errors='coerce')
+                        if not pd.api.types.is_datetime64_any_dtype(raw['date']):
+                            raw['date'] = pd.to_datetime(raw['date'], errors='coerce')
                         daily_agg = (
                             raw
                             .groupby(raw['date'].dt.floor('D'))
@@ -237,27 +237,31 @@ class QualityApp:
                             .reset_index(name='defect_count')
                         )
 
+                        # boolean mask column: scrap counts aggregate with the C 'sum' path, no per-group lambda
+                        raw['is_scrap'] = raw['disposition'].to_numpy() == 'SCRAP'
+
                         curr_mask = (raw['date'] >= pd.to_datetime(curr_start_dt)) & (raw['date'] <= pd.to_datetime(curr_end_dt))
                         prior_mask = (raw['date'] >= pd.to_datetime(prior_start_dt)) & (raw['date'] <= pd.to_datetime(prior_end_dt))
 
+                        # as_index=False/sort=False: final column layout directly, no index rebuild or key sort;
+                        # observed=True: part_number is categorical from load_data, skip parts absent from the window
                         curr = (
                             raw.loc[curr_mask]
-                            .groupby('part_number')
-                            .agg(total_curr=('part_number', 'size'),
-                                 scrap_curr=('disposition', lambda s: (s == 'Scrap').sum()))
-                            .reset_index()
+                            .groupby('part_number', as_index=False, sort=False, observed=True)
+                            .agg(total_curr=('is_scrap', 'size'),
+                                 scrap_curr=('is_scrap', 'sum'))
                         )
 
                         prior = (
                             raw.loc[prior_mask]
-                            .groupby('part_number')
-                            .agg(total_prior=('part_number', 'size'),
-                                 scrap_prior=('disposition', lambda s: (s == 'Scrap').sum()))
-                            .reset_index()
+                            .groupby('part_number', as_index=False, sort=False, observed=True)
+                            .agg(total_prior=('is_scrap', 'size'),
+                                 scrap_prior=('is_scrap', 'sum'))
                         )
 
                         if not curr.empty:
-                            part_agg = curr.merge(prior, on='part_number', how='left').fillna(0)
+                            # fill only the counts: part_number is categorical and rejects a new 0 category
+                            part_agg = curr.merge(prior, on='part_number', how='left').fillna({'total_prior': 0, 'scrap_prior': 0})
                             for c in ['total_curr', 'scrap_curr', 'total_prior', 'scrap_prior']:
                                 if c in part_agg.columns:
                                     part_agg[c] = pd.to_numeric(part_agg[c], errors='coerce').fillna(0).astype(int)
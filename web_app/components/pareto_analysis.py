@@ -1,6 +1,10 @@
 # Fixed: re-add defect_pareto() entrypoint so pages import works.
 # This file defines small local helpers, export_full_pareto_pptx and the dashboard entrypoint defect_pareto.
+import hashlib
 import io
+import os
+import threading
+import time
 import zipfile
 from datetime import datetime, timedelta
 
@@ -9,6 +13,11 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import streamlit as st
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from web_app.utils.db_utils import engine_cache_key, read_sql
+from web_app.utils.export_utils import read_parquet_cache, write_parquet_cache
 
 # Attempt to import the pretty PPTX generator (external helper)
 try:
@@ -37,65 +46,91 @@ except Exception:
     _create_modern_pareto_chart_impl = None
 
 # ---------------------- small local helpers (prevent circular imports) ----------------------
-def _make_png_bytes(fig, width=1200, height=600):
-    """Return PNG bytes of a plotly figure if possible (prefers kaleido)."""
-    try:
-        return fig.to_image(format="png", width=width, height=height)
-    except Exception:
-        try:
-            buf = io.BytesIO()
-            fig.write_image(buf, format="png", width=width, height=height)
-            return buf.getvalue()
-        except Exception:
-            return None
+# already-compressed formats are stored as-is (re-deflating them saves ~nothing)
+_PRECOMPRESSED_EXTS = (".png", ".xlsx", ".pptx", ".zip")
 
 def _make_zip_bundle(files_dict):
     out = io.BytesIO()
-    with zipfile.ZipFile(out, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+    with zipfile.ZipFile(out, mode="w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
         for name, content in files_dict.items():
             if content is None:
                 continue
-            zf.writestr(name, content)
+            if name.lower().endswith(_PRECOMPRESSED_EXTS):
+                zf.writestr(name, content, compress_type=zipfile.ZIP_STORED)
+            else:
+                zf.writestr(name, content)
     return out.getvalue()
 
 # ---------------------- core helpers ----------------------
+# disposition spellings counted as scrap (the ETL stores upper-case; older rows may not be)
+SCRAP_SPELLINGS = ('SCRAP', 'Scrap', 'scrap')
+
+@st.cache_data(ttl=300, show_spinner=False, hash_funcs={Engine: engine_cache_key})
+def _cached_query(query: str, engine) -> pd.DataFrame:
+    """read_sql cached per (query text, engine URL); raises so failed queries are not cached."""
+    return read_sql(query, engine)
+
 def run_query(query, engine):
     if not hasattr(engine, "connect"):
         st.error(f"❌ Invalid engine passed to run_query (got {type(engine)})")
         return pd.DataFrame()
     try:
-        return pd.read_sql(query, engine)
+        return _cached_query(str(query), engine)
     except Exception as e:
         st.error(f"Query failed: {e}")
         return pd.DataFrame()
 
-def load_data_from_db(engine):
-    try:
-        with engine.connect() as conn:
-            pass
-    except Exception as e:
-        st.error(f"❌ Database engine test failed: {e}")
-        return pd.DataFrame()
+@st.cache_data(ttl=300, show_spinner=False, hash_funcs={Engine: engine_cache_key})
+def has_recent_data(engine) -> bool:
+    """Cheap existence probe (last 90 days) so an empty DB skips every tab's queries at once (raises on DB errors so failures are not cached)."""
+    with engine.connect() as conn:
+        return bool(conn.execute(text(
+            "SELECT EXISTS(SELECT 1 FROM quality.clean_quality_data WHERE date >= CURRENT_DATE - INTERVAL '90 days')"
+        )).scalar())
+
+# on-disk Parquet snapshot of the export frame, shared across sessions and server restarts
+RECENT_ROWS_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache")
+RECENT_ROWS_CACHE_TTL_S = 300
 
+def _recent_rows_cache_path(engine) -> str:
+    key = hashlib.sha1(engine_cache_key(engine).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(RECENT_ROWS_CACHE_DIR, f"recent_rows_{key}.parquet")
+
+@st.cache_data(ttl=300, show_spinner=False, hash_funcs={Engine: engine_cache_key})
+def _fetch_recent_rows(engine) -> pd.DataFrame:
+    """Last 90 days of clean_quality_data (cached; raises on DB errors so failures are not cached)."""
+    cache_path = _recent_rows_cache_path(engine)
+    cached = read_parquet_cache(cache_path, RECENT_ROWS_CACHE_TTL_S)
+    if cached is not None:
+        return cached
+    # only the columns the PPTX export reads
     query = """
-        SELECT *
+        SELECT id, date, code_description, disposition, who_made_it
         FROM quality.clean_quality_data
         WHERE date >= CURRENT_DATE - INTERVAL '90 days'
     """
-    df = run_query(query, engine)
-    if df.empty:
-        return df
-
-    df['date'] = pd.to_datetime(df['date'], errors='coerce')
-    df['date_only'] = df['date'].dt.date
-    if 'id' not in df.columns:
-        df['id'] = range(1, len(df) + 1)
+    df = read_sql(query, engine, chunksize=50_000, parse_dates=['date'], partition_on='id')
+    # arrow-backed strings: compact storage for the cached copy and faster hashing in the export groupbys
+    df = df.astype({c: 'string[pyarrow]' for c in ('code_description', 'disposition', 'who_made_it') if c in df.columns})
+    write_parquet_cache(df, cache_path)
+    return df
+
+def load_data_from_db(engine):
+    if not hasattr(engine, "connect"):
+        st.error(f"❌ Invalid engine passed to load_data_from_db (got {type(engine)})")
+        return pd.DataFrame()
+    try:
+        df = _fetch_recent_rows(engine)
+    except Exception as e:
+        st.error(f"❌ Database query failed: {e}")
+        return pd.DataFrame()
     return df
 
 # ---------------------- export to PPTX ----------------------
-def export_full_pareto_pptx(engine, top_n=15, logo_path: str | None = None, brand_color: str = "#2C3E50", accent_color: str = "#FF9900"):
+def export_full_pareto_pptx(engine, top_n=15, logo_path: str | None = None, brand_color: str = "#2C3E50", accent_color: str = "#FF9900", on_progress=None):
     """
     Build a full PPTX using create_pretty_pptx when available, including operator section.
+    on_progress(i, n, title) is forwarded to create_pretty_pptx for per-chart progress.
     Returns bytes or None.
     """
     df = load_data_from_db(engine)
@@ -104,32 +139,27 @@ def export_full_pareto_pptx(engine, top_n=15, logo_path: str | None = None, bran
         return None
 
     # 1) Pareto
-    series = df['code_description'].dropna().astype(str)
+    # categorical: the Pareto helper counts it with np.bincount over the int codes
+    series = df['code_description'].dropna().astype(str).astype('category')
+    if _create_modern_pareto_chart_impl is None:
+        st.warning("Pareto implementation not found; nothing to export.")
+        return None
     try:
-        if _create_modern_pareto_chart_impl:
-            fig_pareto, pareto_data = _create_modern_pareto_chart_impl(series, title='All-Time Defect Pareto', xaxis_title='Defect', top_n=top_n)
-        else:
-            counts = series.value_counts().head(top_n)
-            total = counts.sum()
-            percentages = (counts / total * 100).round(1) if total > 0 else counts * 0
-            cum = percentages.cumsum()
-            fig_pareto = go.Figure()
-            fig_pareto.add_trace(go.Bar(x=counts.index, y=counts.values, name='Count'))
-            fig_pareto.add_trace(go.Scatter(x=counts.index, y=cum.values, name='Cumulative %', yaxis='y2'))
-            pareto_data = pd.DataFrame({'category': counts.index, 'count': counts.values, 'percentage': percentages.values, 'cumulative_percentage': cum.values})
+        fig_pareto, pareto_data = _create_modern_pareto_chart_impl(series, title='All-Time Defect Pareto', xaxis_title='Defect', top_n=top_n)
     except Exception:
         return None
 
     # 2) Monthly defects time series
-    df['month'] = pd.to_datetime(df['date']).dt.to_period('M').dt.to_timestamp()
-    perf = df.groupby('month').size().reset_index(name='total_defects')
+    df['month'] = df['date'].dt.to_period('M').dt.to_timestamp()
+    perf = df['month'].value_counts(sort=False).sort_index().rename_axis('month').reset_index(name='total_defects')
     fig_perf = go.Figure()
     fig_perf.add_trace(go.Scatter(x=perf['month'], y=perf['total_defects'], mode='lines+markers', name='Defects'))
     fig_perf.update_layout(title='Monthly Defects', xaxis_title='Month', yaxis_title='Defects')
 
     # 3) Disposition pie
-    disp = df['disposition'].fillna('UNKNOWN')
+    disp = df['disposition'].fillna('UNKNOWN').astype('category')
     disp_counts = disp.value_counts()
+    disp_counts = disp_counts[disp_counts > 0]
     fig_disp = px.pie(names=disp_counts.index, values=disp_counts.values, title='Disposition Breakdown')
 
     # 4) Top operators via impl helper (if available) - use overall window returned by load_data_from_db
@@ -144,14 +174,17 @@ def export_full_pareto_pptx(engine, top_n=15, logo_path: str | None = None, bran
     else:
         # fallback compute from df
         if 'who_made_it' in df.columns:
-            op = df.groupby('who_made_it').agg(defect_count=('id', 'count')).reset_index().rename(columns={'who_made_it': 'operator_id'})
-            if 'disposition' in df.columns:
-                scraps = df[df['disposition'].str.upper() == 'SCRAP'].groupby('who_made_it').size().reset_index(name='scrap_count')
-                scraps = scraps.rename(columns={'who_made_it': 'operator_id'})
-                op = op.merge(scraps, on='operator_id', how='left')
-                op['scrap_count'] = op['scrap_count'].fillna(0).astype(int)
-            else:
-                op['scrap_count'] = 0
+            # single groupby for both totals and scrap counts
+            # membership test over the case variants instead of rebuilding an upper-cased column
+            is_scrap = df['disposition'].isin(SCRAP_SPELLINGS) if 'disposition' in df.columns else False
+            op = (
+                df.assign(_is_scrap=is_scrap)
+                .groupby('who_made_it', sort=False)
+                .agg(defect_count=('_is_scrap', 'size'), scrap_count=('_is_scrap', 'sum'))
+                .reset_index()
+                .rename(columns={'who_made_it': 'operator_id'})
+            )
+            op['scrap_count'] = op['scrap_count'].astype(int)
             op['scrap_rate'] = np.where(op['defect_count'] == 0, 0, (op['scrap_count'] / op['defect_count'] * 100)).round(1)
             op = op.sort_values('defect_count', ascending=False).reset_index(drop=True)
             top_ops_table = op.head(top_n)
@@ -172,23 +205,43 @@ def export_full_pareto_pptx(engine, top_n=15, logo_path: str | None = None, bran
         tables['Top Operators'] = top_ops_table
 
     # Use pretty PPTX generator if available
-    if HAS_PRETTY_PPTX and create_pretty_pptx is not None:
-        try:
-            pptx_bytes = create_pretty_pptx(plots, tables, title='Quality Pareto Analysis', logo_path=logo_path, brand_color=brand_color, accent_color=accent_color)
-            return pptx_bytes
-        except Exception as e:
-            st.error(f"PPTX generation failed: {e}")
-            return None
-
-    # Fallback: basic PPTX via a fallback function if present, else None
+    if not HAS_PRETTY_PPTX or create_pretty_pptx is None:
+        return None
     try:
-        # If an older fallback exists in another module, use it; otherwise return None
-        from web_app.components.pareto_analysis import _create_full_pptx as fallback_pptx  # local fallback (only if present)
-        return fallback_pptx(plots, tables, title='Quality Pareto Analysis', logo_path=logo_path)
-    except Exception:
+        return create_pretty_pptx(plots, tables, title='Quality Pareto Analysis', logo_path=logo_path, brand_color=brand_color, accent_color=accent_color, on_progress=on_progress)
+    except Exception as e:
+        st.error(f"PPTX generation failed: {e}")
         return None
 
+# Built PPTX bytes per (engine URL, top_n), kept PPTX_CACHE_TTL_S. A plain process-wide dict rather than
+# st.cache_data: the build drives an st.progress bar created by the caller, and st.cache_data would
+# replay that element call on a hit (CacheReplayClosureError). Only pure bytes are stored here.
+PPTX_CACHE_TTL_S = 300
+_PPTX_CACHE_MAX = 8
+_pptx_cache: dict = {}
+_pptx_cache_lock = threading.Lock()
+
+def _cached_pptx_bytes(engine, top_n: int, on_progress=None) -> bytes | None:
+    """PPTX bytes for engine/top_n; on a miss the deck is built (on_progress fires per chart) and stored. Failures are not cached."""
+    key = (engine_cache_key(engine), int(top_n))
+    now = time.monotonic()
+    with _pptx_cache_lock:
+        hit = _pptx_cache.get(key)
+        if hit is not None and now - hit[0] < PPTX_CACHE_TTL_S:
+            return hit[1]
+    pptx_bytes = export_full_pareto_pptx(engine, top_n=top_n, on_progress=on_progress)
+    if pptx_bytes:
+        with _pptx_cache_lock:
+            _pptx_cache[key] = (now, pptx_bytes)
+            # drop expired entries, then the oldest ones beyond the cap
+            for k in [k for k, (ts, _) in _pptx_cache.items() if now - ts >= PPTX_CACHE_TTL_S]:
+                del _pptx_cache[k]
+            while len(_pptx_cache) > _PPTX_CACHE_MAX:
+                del _pptx_cache[min(_pptx_cache, key=lambda k: _pptx_cache[k][0])]
+    return pptx_bytes
+
 # ---------------------- main dashboard entrypoint required by pages ----------------------
+
 def defect_pareto(engine, top_n=15):
     """
     Primary entry for the Pareto dashboard.
@@ -202,7 +255,12 @@ def defect_pareto(engine, top_n=15):
     with col_button:
         if st.button("📥 Export PPTX"):
             with st.spinner("Building presentation…"):
-                pptx_bytes = export_full_pareto_pptx(engine, top_n=top_n)
+                bar = st.progress(0.0, text="Rendering charts…")
+                try:
+                    pptx_bytes = _cached_pptx_bytes(engine, top_n, on_progress=lambda i, n, t: bar.progress(i / n, text=t))
+                except Exception:
+                    pptx_bytes = None
+                bar.empty()
                 if pptx_bytes:
                     st.download_button(
                         label="Download Presentation",
@@ -213,8 +271,15 @@ def defect_pareto(engine, top_n=15):
                 else:
                     st.error("Presentation creation failed or python-pptx not available on the server.")
 
-    df = load_data_from_db(engine)
-    if df is None or df.empty:
+    if engine is None or not hasattr(engine, "connect"):
+        st.error(f"❌ Invalid engine passed to defect_pareto (got {type(engine)})")
+        return
+    try:
+        recent = has_recent_data(engine)
+    except Exception as e:
+        st.error(f"❌ Database query failed: {e}")
+        return
+    if not recent:
         st.info("No data available for analysis")
         return
 
@@ -232,7 +297,8 @@ def defect_pareto(engine, top_n=15):
                 r = _render_chronic_issues_impl(engine, top_n=top_n, debug=False, sort_by='scrap_rate')
                 if isinstance(r, tuple) and len(r) == 2:
                     fig_top, df_top = r
-                    st.plotly_chart(fig_top, use_container_width=True)
+                    fig_top.update_layout(uirevision='chronic_issues')
+                    st.plotly_chart(fig_top, use_container_width=True, key='chronic_issues_chart')
             except Exception:
                 st.info("Chronic issues view (impl) raised an exception - see console.")
         else:
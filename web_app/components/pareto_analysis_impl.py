@@ -4,70 +4,237 @@ Implementation module for pareto analysis components — updated to:
  - ensure operator trend pivots are datetime-indexed and sorted so line charts render correctly
 """
 from __future__ import annotations
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional, Tuple
 
 import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 import streamlit as st
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from web_app.utils.db_utils import engine_cache_key, read_sql
+from web_app.utils.export_utils import to_csv_bytes
+
+# Serialize figure JSON (to_json / from_json round-trips below) with orjson when installed
+try:
+    pio.json.config.default_engine = "orjson"
+    HAS_ORJSON = True
+except Exception:
+    HAS_ORJSON = False
+
+# Shared st.cache_data settings for DB query helpers: results live 5 minutes and
+# engines hash by URL. Helpers raise on DB errors so failures are never cached.
+_QUERY_CACHE = dict(ttl=300, show_spinner=False, hash_funcs={Engine: engine_cache_key})
 
 
 # ------------------------ Pareto helper ------------------------------------
-def create_modern_pareto_chart(series: pd.Series, title: str, xaxis_title: str, top_n: int = 15) -> Tuple[Optional[go.Figure], pd.DataFrame]:
-    """Create a modern Pareto chart (bar + cumulative line) and return (fig, pareto_df)."""
+def _top_counts(series: pd.Series, top_n: int, weights: Optional[pd.Series] = None) -> pd.Series:
+    """
+    Equivalent of value_counts().head(top_n): integer codes (categorical codes or pd.factorize)
+    are counted with np.bincount and only the top_n are ordered (argpartition, not a full sort).
+    With weights it is groupby(series)[weights].sum().nlargest(top_n) instead.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, labels = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        codes, labels = pd.factorize(series)
+    valid = codes >= 0
+    w = None if weights is None else weights.to_numpy()[valid]
+    counts = np.bincount(codes[valid], weights=w, minlength=len(labels))
+    if len(counts) > top_n:
+        order = np.argpartition(-counts, top_n)[:top_n]
+        order = order[np.argsort(-counts[order], kind="stable")]
+    else:
+        order = np.argsort(-counts, kind="stable")
+    order = order[counts[order] > 0]
+    return pd.Series(counts[order], index=labels[order], name="count")
+
+
+def _hash_series(s: pd.Series) -> bytes:
+    """Content hash for a Series (index ignored) so reruns with the same data hit the cache."""
+    return pd.util.hash_pandas_object(s, index=False).values.tobytes()
+
+
+@st.cache_data(show_spinner=False, max_entries=32, hash_funcs={pd.Series: _hash_series})
+def _pareto_chart_parts(series: pd.Series, title: str, xaxis_title: str, top_n: int = 15) -> Tuple[Optional[dict], pd.DataFrame]:
+    """Cached core of create_modern_pareto_chart: returns (fig_dict, pareto_df) so the result is picklable."""
     if series is None or series.dropna().empty:
         return None, pd.DataFrame()
 
-    counts = series.value_counts().head(top_n)
+    counts = _top_counts(series, top_n)
     if counts.empty:
         return None, pd.DataFrame()
 
-    total = int(counts.sum())
-    percentages = (counts / total * 100).round(1)
-    cumulative = percentages.cumsum()
-
-    fig = go.Figure()
-    fig.add_trace(go.Bar(
-        x=counts.index,
-        y=counts.values,
-        name="Count",
-        marker_color="#3366cc",
-        text=counts.values,
-        textposition="auto",
-    ))
-    fig.add_trace(go.Scatter(
-        x=counts.index,
-        y=cumulative.values,
-        name="Cumulative %",
-        yaxis="y2",
-        line=dict(color="#ff9900", width=3),
-        marker=dict(size=6)
-    ))
-    fig.update_layout(
-        title=title,
-        xaxis_title=xaxis_title,
-        yaxis_title="Count",
-        yaxis2=dict(title="Cumulative %", overlaying="y", side="right", range=[0, 100]),
-        xaxis_tickangle=-45,
-        hovermode="x unified",
-        height=520,
-        template="plotly_white",
-        margin=dict(l=120, r=60, t=80, b=160)
+    # percentages/cumulative on the raw numpy array (no intermediate Series)
+    count_values = counts.to_numpy()
+    percentages = np.round(count_values * (100.0 / count_values.sum()), 1)
+    cumulative = np.cumsum(percentages)
+
+    # build in one constructor call so the figure is validated once
+    fig = go.Figure(
+        data=[
+            go.Bar(
+                x=counts.index,
+                y=counts.values,
+                name="Count",
+                marker_color="#3366cc",
+                text=counts.values,
+                textposition="auto",
+            ),
+            go.Scatter(
+                x=counts.index,
+                y=cumulative,
+                name="Cumulative %",
+                yaxis="y2",
+                line=dict(color="#ff9900", width=3),
+                marker=dict(size=6)
+            ),
+        ],
+        layout=go.Layout(
+            title=title,
+            xaxis=dict(title=xaxis_title, tickangle=-45),
+            yaxis=dict(title="Count"),
+            yaxis2=dict(title="Cumulative %", overlaying="y", side="right", range=[0, 100]),
+            hovermode="x unified",
+            height=520,
+            template="plotly_white",
+            margin=dict(l=120, r=60, t=80, b=160)
+        ),
     )
 
     pareto_df = pd.DataFrame({
         "category": counts.index.astype(str),
-        "count": counts.values,
-        "percentage": percentages.values,
-        "cumulative_percentage": cumulative.values
+        "count": count_values,
+        "percentage": percentages,
+        "cumulative_percentage": cumulative
     })
 
-    return fig, pareto_df
+    return fig.to_dict(), pareto_df
+
+
+def create_modern_pareto_chart(series: pd.Series, title: str, xaxis_title: str, top_n: int = 15) -> Tuple[Optional[go.Figure], pd.DataFrame]:
+    """Create a modern Pareto chart (bar + cumulative line) and return (fig, pareto_df)."""
+    fig_dict, pareto_df = _pareto_chart_parts(series, title, xaxis_title, top_n)
+    if fig_dict is None:
+        return None, pareto_df
+    return go.Figure(fig_dict), pareto_df
 
 
 # ------------------------ Chronic issues ------------------------------------
+@st.cache_data(**_QUERY_CACHE)
+def _fetch_chronic_issues(engine, top_n: int, sort_by: str = "scrap_rate") -> pd.DataFrame:
+    """
+    Top defects by count with scrap counts, scrap_rate and share of the top-N total,
+    ordered by sort_by ("scrap_rate" or defect_count). Reads the nightly quality.mv_defect_rollup view; falls back to the base table if the view is missing.
+    """
+    rates = """
+        ROUND(COALESCE(100.0 * scrap_count / NULLIF(defect_count, 0), 0), 1)::float8 AS scrap_rate,
+        ROUND(100.0 * defect_count / SUM(defect_count) OVER (), 1)::float8 AS defect_percentage
+    """
+    order_by = "scrap_rate DESC, defect_count DESC" if sort_by == "scrap_rate" else "defect_count DESC"
+    # the view already carries the severity band; only the top-N rows are rated here
+    mv_query = text(f"""
+    SELECT defect, defect_count, scrap_count, {rates}, severity
+    FROM (
+        SELECT defect, defect_count, scrap_count, severity
+        FROM quality.mv_defect_rollup
+        ORDER BY defect_count DESC
+        LIMIT :top_n
+    ) top_defects
+    ORDER BY {order_by}
+    """)
+    try:
+        return _narrow_chronic_dtypes(read_sql(mv_query, engine, params={"top_n": int(top_n)}))
+    except Exception:
+        pass
+
+    # covered by idx_clean_code_date (code_description, date) INCLUDE (disposition): index-only scan,
+    # the NULL/'' predicate and the SCRAP filter are evaluated on index tuples.
+    # scrap_rate is computed once in the inner select; the severity CASE reads it (same 20/40/70 bands as the view)
+    query = text(f"""
+    SELECT
+        defect, defect_count, scrap_count, scrap_rate, defect_percentage,
+        CASE
+            WHEN scrap_rate >= 70 THEN 3
+            WHEN scrap_rate >= 40 THEN 2
+            WHEN scrap_rate >= 20 THEN 1
+            ELSE 0
+        END AS severity
+    FROM (
+        SELECT defect, defect_count, scrap_count, {rates}
+        FROM (
+            SELECT
+                code_description AS defect,
+                COUNT(*) AS defect_count,
+                COUNT(*) FILTER (WHERE UPPER(disposition) = 'SCRAP') AS scrap_count
+            FROM quality.clean_quality_data
+            WHERE code_description IS NOT NULL AND code_description != ''
+            GROUP BY code_description
+            ORDER BY defect_count DESC
+            LIMIT :top_n
+        ) top_defects
+    ) rated
+    ORDER BY {order_by}
+    """)
+    return _narrow_chronic_dtypes(read_sql(query, engine, params={"top_n": int(top_n)}))
+
+
+def _narrow_chronic_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Rates, shares and ordering come from SQL (never NULL); only narrow the dtypes."""
+    if df.empty:
+        return df
+    return df.astype({"defect_count": "int32", "scrap_count": "int32", "scrap_rate": "float32", "defect_percentage": "float32", "severity": "int8"})
+
+
+# bar colour per SQL severity band: 0 (<20%), 1 (>=20%), 2 (>=40%), 3 (>=70% scrap rate)
+SEVERITY_COLORS = np.array(["#44FF88", "#44AAFF", "#FFAA44", "#FF4444"])
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _chronic_issues_figure_json(df: pd.DataFrame) -> str:
+    """Horizontal scrap-rate bar chart for the chronic-issues table, returned as Plotly JSON."""
+    colors = SEVERITY_COLORS[df["severity"].to_numpy()]
+    # one float32 block filled column by column (counts < 2**24 stay exact) instead of cast copies + stack
+    customdata = np.empty((len(df), 3), dtype=np.float32)
+    customdata[:, 0] = df["defect_count"].to_numpy()
+    customdata[:, 1] = df["scrap_count"].to_numpy()
+    customdata[:, 2] = df["defect_percentage"].to_numpy()
+    fig = go.Figure(
+        data=[go.Bar(
+            x=list(df["scrap_rate"]),
+            y=list(df["defect"]),
+            orientation="h",
+            marker=dict(color=colors.tolist(), line=dict(color="darkgray", width=1)),
+            customdata=customdata,
+            hovertemplate=(
+                "<b>%{y}</b><br>"
+                "Scrap Rate: <b>%{x:.1f}%</b><br>"
+                "Total Defects: %{customdata[0]:,}<br>"
+                "Scrap Count: %{customdata[1]:,}<br>"
+                "Frequency: %{customdata[2]:.1f}%<br>"
+                "<extra></extra>"
+            )
+        )],
+        layout=go.Layout(
+            title="Defects by Scrap Rate Impact",
+            xaxis=dict(title="Scrap Rate (%)", range=[0, 100]),
+            yaxis=dict(title="Defect", autorange="reversed"),
+            height=max(480, len(df) * 36),
+            template="plotly_white",
+            margin=dict(l=220, r=20, t=80, b=50),
+        ),
+    )
+    return fig.to_json()
+
+
 def render_chronic_issues(engine, top_n: int = 15, debug: bool = False, sort_by: str = "scrap_rate"):
     """
     Render chronic issues UI text and return (fig, df_top) — do NOT call st.plotly_chart here
@@ -76,21 +243,8 @@ def render_chronic_issues(engine, top_n: int = 15, debug: bool = False, sort_by:
     st.markdown("### 🔧 Chronic Quality Issues")
     st.info("Defects ranked by scrap rate impact for prioritization.")
 
-    query = f"""
-    SELECT
-        code_description AS defect,
-        COUNT(*) AS defect_count,
-        COUNT(CASE WHEN UPPER(disposition) = 'SCRAP' THEN 1 END) AS scrap_count
-    FROM quality.clean_quality_data
-    WHERE code_description IS NOT NULL AND code_description != ''
-    GROUP BY code_description
-    HAVING COUNT(*) > 0
-    ORDER BY defect_count DESC
-    LIMIT {top_n}
-    """
-
     try:
-        df = pd.read_sql(query, engine)
+        df = _fetch_chronic_issues(engine, top_n, sort_by)
     except Exception as e:
         st.error(f"Failed to load chronic issues: {e}")
         return None
@@ -99,52 +253,8 @@ def render_chronic_issues(engine, top_n: int = 15, debug: bool = False, sort_by:
         st.info("No chronic defect data available.")
         return None
 
-    # normalize
-    df["defect_count"] = pd.to_numeric(df["defect_count"], errors="coerce").fillna(0).astype(int)
-    df["scrap_count"] = pd.to_numeric(df["scrap_count"], errors="coerce").fillna(0).astype(int)
-    df["scrap_rate"] = np.where(df["defect_count"] > 0, df["scrap_count"] / df["defect_count"] * 100, 0.0).round(1)
-    df["defect_percentage"] = (df["defect_count"] / df["defect_count"].sum() * 100).round(1)
-
-    if sort_by == "scrap_rate":
-        df = df.sort_values("scrap_rate", ascending=False)
-    else:
-        df = df.sort_values("defect_count", ascending=False)
-
-    # build chart (but do not render it here)
-    def color_for(rate):
-        if rate >= 70:
-            return "#FF4444"
-        if rate >= 40:
-            return "#FFAA44"
-        if rate >= 20:
-            return "#44AAFF"
-        return "#44FF88"
-
-    colors = [color_for(r) for r in df["scrap_rate"]]
-    fig = go.Figure()
-    fig.add_trace(go.Bar(
-        x=list(df["scrap_rate"]),
-        y=list(df["defect"]),
-        orientation="h",
-        marker=dict(color=colors, line=dict(color="darkgray", width=1)),
-        customdata=np.stack([df["defect_count"].astype(int), df["scrap_count"].astype(int), df["defect_percentage"].astype(float)], axis=1),
-        hovertemplate=(
-            "<b>%{y}</b><br>"
-            "Scrap Rate: <b>%{x:.1f}%</b><br>"
-            "Total Defects: %{customdata[0]:,}<br>"
-            "Scrap Count: %{customdata[1]:,}<br>"
-            "Frequency: %{customdata[2]:.1f}%<br>"
-            "<extra></extra>"
-        )
-    ))
-    fig.update_layout(
-        title="Defects by Scrap Rate Impact",
-        xaxis=dict(title="Scrap Rate (%)", range=[0, 100]),
-        yaxis=dict(title="Defect", autorange="reversed"),
-        height=max(480, len(df) * 36),
-        template="plotly_white",
-        margin=dict(l=220, r=20, t=80, b=50),
-    )
+    # build chart (but do not render it here); the serialized figure is cached per result set
+    fig = pio.from_json(_chronic_issues_figure_json(df))
 
     # debug info (keeps developer visibility)
     if debug:
@@ -156,56 +266,158 @@ def render_chronic_issues(engine, top_n: int = 15, debug: bool = False, sort_by:
 
 
 # ------------------------ Operator trends (modular) ------------------------
-def fetch_operator_data(engine, months: int = 24) -> pd.DataFrame:
-    """Fetch monthly operator aggregates (month, operator_id, defect_count, scrap_count)"""
-    query = f"""
+def scrap_rate_pct(scrap_count: pd.Series, defect_count: pd.Series, decimals: int = 2) -> np.ndarray:
+    """Scrap rate in percent (float32); rows with zero defects get 0 without evaluating the division."""
+    scrap = scrap_count.to_numpy(dtype=np.float64)
+    defects = defect_count.to_numpy(dtype=np.float64)
+    rate = np.zeros_like(defects)
+    np.divide(scrap, defects, out=rate, where=defects != 0)
+    return np.round(rate * 100, decimals).astype(np.float32)
+
+
+@st.cache_data(**_QUERY_CACHE)
+def _fetch_operator_monthly(engine, months: int) -> pd.DataFrame:
+    """
+    Monthly per-operator defect/scrap counts and scrap_rate for the last `months` months, typed for plotting.
+    Reads the nightly materialized view; falls back to the base table if the view is missing.
+    """
+    mv_query = text("""
+    SELECT month, operator_id, defect_count, scrap_count
+    FROM quality.mv_monthly_operator_defects
+    WHERE month >= DATE_TRUNC('month', CURRENT_DATE - (:months * INTERVAL '1 month'))::date
+    ORDER BY month, operator_id
+    """)
+    try:
+        return _prepare_operator_monthly(read_sql(mv_query, engine, params={"months": int(months)}, parse_dates=["month"]))
+    except Exception:
+        pass
+
+    query = text("""
     SELECT
         DATE_TRUNC('month', date)::date AS month,
         who_made_it AS operator_id,
         COUNT(*) AS defect_count,
-        SUM(CASE WHEN UPPER(disposition) = 'SCRAP' THEN 1 ELSE 0 END) AS scrap_count
+        COUNT(*) FILTER (WHERE UPPER(disposition) = 'SCRAP') AS scrap_count
     FROM quality.clean_quality_data
-    WHERE date >= CURRENT_DATE - INTERVAL '{int(months)} months'
+    WHERE date >= DATE_TRUNC('month', CURRENT_DATE - (:months * INTERVAL '1 month'))
       AND who_made_it IS NOT NULL
     GROUP BY DATE_TRUNC('month', date)::date, who_made_it
     ORDER BY month, who_made_it
-    """
+    """)
+    return _prepare_operator_monthly(read_sql(query, engine, params={"months": int(months)}, parse_dates=["month"]))
+
+
+def _prepare_operator_monthly(df: pd.DataFrame) -> pd.DataFrame:
+    """Dtype/rate post-processing, done once inside the cached fetch instead of on every rerun."""
+    if df.empty:
+        return df
+    # operator ids repeat every month: categorical keys group/pivot on int codes;
+    # encode first, then stringify only the distinct labels (not every row)
+    ops = df["operator_id"].astype("category")
+    df["operator_id"] = ops.cat.rename_categories(ops.cat.categories.astype(str))
+    # COUNT(*) / FILTER counts are never NULL: a direct cast, no to_numeric/fillna passes
+    df = df.astype({"defect_count": "int32", "scrap_count": "int32"})
+    df["scrap_rate"] = scrap_rate_pct(df["scrap_count"], df["defect_count"])
+    # SQL already orders by month; only sort if that ever stops holding
+    return df if df["month"].is_monotonic_increasing else df.sort_values("month", kind="stable")
+
+
+def fetch_operator_data(engine, months: int = 24) -> pd.DataFrame:
+    """Fetch monthly operator aggregates (month, operator_id, defect_count, scrap_count)"""
     try:
-        df = pd.read_sql(query, engine)
+        df = _fetch_operator_monthly(engine, months)
     except Exception as e:
         st.error(f"Failed to load operator trend data: {e}")
         return pd.DataFrame()
+    return df
+
+
+@st.cache_data(**_QUERY_CACHE)
+def _fetch_top_operators(engine, start_month: Optional[pd.Timestamp], end_month: Optional[pd.Timestamp], months: int, top_n: int) -> pd.DataFrame:
+    """Operators ranked by defect count in SQL, LIMITed to top_n."""
+    clauses = ["date >= CURRENT_DATE - (:months * INTERVAL '1 month')", "who_made_it IS NOT NULL"]
+    params = {"months": int(months), "top_n": int(top_n)}
+    if start_month is not None:
+        clauses.append("date >= :start_month")
+        params["start_month"] = pd.Timestamp(start_month).date()
+    if end_month is not None:
+        clauses.append("date < :end_month")
+        params["end_month"] = (pd.Timestamp(end_month) + pd.offsets.MonthBegin(1)).date()
+    query = text(f"""
+    SELECT
+        who_made_it AS operator_id,
+        COUNT(*) AS defect_count,
+        COUNT(*) FILTER (WHERE UPPER(disposition) = 'SCRAP') AS scrap_count
+    FROM quality.clean_quality_data
+    WHERE {" AND ".join(clauses)}
+    GROUP BY who_made_it
+    ORDER BY defect_count DESC
+    LIMIT :top_n
+    """)
+    return read_sql(query, engine, params=params)
+
+
+def fetch_top_operators(engine, start_month: Optional[pd.Timestamp] = None, end_month: Optional[pd.Timestamp] = None, months: int = 36, top_n: int = 10) -> pd.DataFrame:
+    """Rank operators by defect count in SQL and return only the top_n rows (operator_id, defect_count, scrap_count, scrap_rate)."""
+    try:
+        df = _fetch_top_operators(engine, start_month, end_month, months, top_n)
+    except Exception as e:
+        st.error(f"Failed to load top operators: {e}")
+        return pd.DataFrame()
 
     if df.empty:
         return df
 
-    df["month"] = pd.to_datetime(df["month"])
     df["operator_id"] = df["operator_id"].astype(str)
-    df["defect_count"] = pd.to_numeric(df["defect_count"], errors="coerce").fillna(0).astype(int)
-    df["scrap_count"] = pd.to_numeric(df["scrap_count"], errors="coerce").fillna(0).astype(int)
-    df["scrap_rate"] = np.where(df["defect_count"] > 0, df["scrap_count"] / df["defect_count"] * 100, 0.0).round(2)
-    df = df.sort_values("month")  # ensure chronological order
-    return df
+    # COUNT(*) / FILTER counts are never NULL: a direct cast, no to_numeric/fillna passes
+    df = df.astype({"defect_count": "int32", "scrap_count": "int32"})
+    df["scrap_rate"] = scrap_rate_pct(df["scrap_count"], df["defect_count"])
+    return df.reset_index(drop=True)
 
 
-def to_month_period(dt) -> pd.Timestamp:
-    """Normalize an input date to the month period start (Timestamp)."""
+@lru_cache(maxsize=64)
+def _month_start(dt) -> pd.Timestamp:
     return pd.to_datetime(dt).to_period("M").to_timestamp()
 
 
+def to_month_period(dt) -> pd.Timestamp:
+    """Normalize an input date to the month period start (Timestamp); date_input values are memoized."""
+    try:
+        return _month_start(dt)
+    except TypeError:  # unhashable input
+        return pd.to_datetime(dt).to_period("M").to_timestamp()
+
+
 def filter_operator_data_by_month_range(df: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
-    """Filter operator-level monthly dataframe between start and end inclusive."""
+    """Filter operator-level monthly dataframe between start and end inclusive (df must be sorted by month)."""
     if df.empty:
         return df
-    return df[(df["month"] >= start) & (df["month"] <= end)].copy()
+    # month-sorted (cached fetch): slice bounds via searchsorted; callers only read the slice
+    months = df["month"].to_numpy()
+    lo = np.searchsorted(months, pd.Timestamp(start).to_datetime64(), side="left")
+    hi = np.searchsorted(months, pd.Timestamp(end).to_datetime64(), side="right")
+    return df.iloc[lo:hi]
 
 
 def compute_operator_aggregates(filtered_df: pd.DataFrame) -> pd.DataFrame:
     """Aggregate by operator and compute scrap rate."""
     if filtered_df.empty:
         return pd.DataFrame(columns=["operator_id", "defect_count", "scrap_count", "scrap_rate"])
-    agg = filtered_df.groupby("operator_id", dropna=False)[["defect_count", "scrap_count"]].sum().reset_index()
-    agg["scrap_rate"] = np.where(agg["defect_count"] > 0, agg["scrap_count"] / agg["defect_count"] * 100, 0.0).round(2)
+    # dense int codes (categorical codes or pd.factorize, NaN kept as its own key like dropna=False):
+    # one weighted bincount per column instead of a hash groupby
+    ops = filtered_df["operator_id"]
+    if isinstance(ops.dtype, pd.CategoricalDtype) and not ops.isna().any():
+        codes, labels = ops.cat.codes.to_numpy(), ops.cat.categories
+    else:
+        codes, labels = pd.factorize(ops, use_na_sentinel=False)
+    n = len(labels)
+    present = np.bincount(codes, minlength=n) > 0
+    agg = pd.DataFrame({
+        "operator_id": labels[present].astype(str),
+        "defect_count": np.bincount(codes, weights=filtered_df["defect_count"].to_numpy(), minlength=n)[present].astype(np.int32),
+        "scrap_count": np.bincount(codes, weights=filtered_df["scrap_count"].to_numpy(), minlength=n)[present].astype(np.int32),
+    })
+    agg["scrap_rate"] = scrap_rate_pct(agg["scrap_count"], agg["defect_count"])
     agg = agg.sort_values("defect_count", ascending=False).reset_index(drop=True)
     return agg
 
@@ -216,49 +428,51 @@ def build_operator_plots(filtered_df: pd.DataFrame, agg_df: pd.DataFrame, top_n:
         return None, None, None
 
     top_ops = agg_df.head(top_n)["operator_id"].tolist()
-
-    # Monthly defects pivot (ensure month index is datetime and sorted)
-    defects_pivot = filtered_df.pivot_table(index="month", columns="operator_id", values="defect_count", aggfunc="sum").fillna(0)
-    if not defects_pivot.empty:
-        # ensure datetime index and chronological order
-        defects_pivot.index = pd.to_datetime(defects_pivot.index)
-        defects_pivot = defects_pivot.sort_index()
+    if top_ops:
+        # only the plotted operators are reshaped
+        filtered_df = filtered_df[filtered_df["operator_id"].isin(top_ops)]
+    if isinstance(filtered_df["operator_id"].dtype, pd.CategoricalDtype):
+        filtered_df = filtered_df.assign(operator_id=filtered_df["operator_id"].cat.remove_unused_categories())
+
+    # Rows are already unique per (month, operator_id), so a plain reshape suffices (no groupby pass)
+    # unstack(fill_value=0) fills gaps while reshaping instead of a NaN pass + fillna;
+    # month is parsed as datetime in SQL and unstack returns it sorted, so no re-parse/sort_index
+    month_op = filtered_df.set_index(["month", "operator_id"])
+    defects_pivot = month_op["defect_count"].unstack("operator_id", fill_value=0)
     if top_ops:
         defects_pivot = defects_pivot.reindex(columns=top_ops, fill_value=0)
 
     fig_def = None
     if not defects_pivot.empty:
-        fig_def = go.Figure()
-        for col in defects_pivot.columns:
-            fig_def.add_trace(go.Scatter(x=defects_pivot.index, y=defects_pivot[col], mode="lines+markers", name=str(col)))
-        fig_def.update_layout(title=f"Monthly Defects - Top {min(len(top_ops), top_n)} Operators", xaxis_title="Month", yaxis_title="Defects", height=380)
-        fig_def.update_xaxes(type="date", tickformat="%b %Y")
+        # wide-form px.line: one call for all operators; zero-filled months stay on the line
+        fig_def = px.line(defects_pivot, markers=True, title=f"Monthly Defects - Top {min(len(top_ops), top_n)} Operators", labels={"operator_id": "Operator"})
+        fig_def.update_layout(xaxis=dict(title="Month", type="date", tickformat="%b %Y"), yaxis_title="Defects", height=380, uirevision="operator_defects")
 
     # monthly scrap rate pivot
-    scrap_pivot = filtered_df.pivot_table(index="month", columns="operator_id", values="scrap_rate", aggfunc="mean").fillna(0)
-    if not scrap_pivot.empty:
-        scrap_pivot.index = pd.to_datetime(scrap_pivot.index)
-        scrap_pivot = scrap_pivot.sort_index()
+    scrap_pivot = month_op["scrap_rate"].unstack("operator_id", fill_value=0)
     if top_ops:
         scrap_pivot = scrap_pivot.reindex(columns=top_ops, fill_value=0)
 
     fig_scrap = None
     if not scrap_pivot.empty:
-        fig_scrap = go.Figure()
-        for col in scrap_pivot.columns:
-            fig_scrap.add_trace(go.Scatter(x=scrap_pivot.index, y=scrap_pivot[col], mode="lines+markers", name=str(col)))
-        fig_scrap.update_layout(title=f"Monthly Scrap Rate (%) - Top {min(len(top_ops), top_n)} Operators", xaxis_title="Month", yaxis_title="Scrap Rate (%)", height=380)
-        fig_scrap.update_xaxes(type="date", tickformat="%b %Y")
+        fig_scrap = px.line(scrap_pivot, markers=True, title=f"Monthly Scrap Rate (%) - Top {min(len(top_ops), top_n)} Operators", labels={"operator_id": "Operator"})
+        fig_scrap.update_layout(xaxis=dict(title="Month", type="date", tickformat="%b %Y"), yaxis_title="Scrap Rate (%)", height=380, uirevision="operator_scrap")
 
     # top operators bar
     fig_top = None
     if not agg_df.empty:
-        fig_top = px.bar(agg_df.head(top_n), x="operator_id", y="defect_count", labels={"operator_id": "Operator", "defect_count": "Total Defects"}, title=f"Top {min(len(agg_df), top_n)} Operators by Defect Count")
-        fig_top.update_layout(height=380)
+        fig_top = px.bar(agg_df.head(top_n), x="operator_id", y="defect_count", labels={"operator_id": "Operator", "defect_count": "Total Defects"}, title=f"Top {min(len(agg_df), top_n)} Operators by Defect Count", height=380)
 
     return fig_def, fig_scrap, fig_top
 
 
+@st.cache_data(show_spinner=False, max_entries=32)
+def _operator_plots_json(filtered_df: pd.DataFrame, agg_df: pd.DataFrame, top_n: int) -> Tuple[Optional[str], Optional[str]]:
+    """Serialized (defects, scrap rate) operator figures; revisiting a range/top-N selection skips the rebuild."""
+    fig_def, fig_scrap, _ = build_operator_plots(filtered_df, agg_df, top_n=top_n)
+    return (fig_def.to_json() if fig_def else None, fig_scrap.to_json() if fig_scrap else None)
+
+
 def render_operator_trends(engine):
     """Full UI for operator trends, implemented modularly for readability and export reuse."""
     st.markdown("### 👥 Operator Performance Trends")
@@ -269,6 +483,15 @@ def render_operator_trends(engine):
         st.warning("No operator trend data available.")
         return None
 
+    _operator_trends_view(operator_data)
+
+    # Return nothing (UI is rendered). get_top_operators_section can be used by exports.
+    return None
+
+
+@st.fragment
+def _operator_trends_view(operator_data: pd.DataFrame):
+    """Range/top-N driven part of the operator trends; reruns on its own when those widgets change."""
     # date selector aligned to months (month-level)
     min_month = operator_data["month"].min().date()
     max_month = operator_data["month"].max().date()
@@ -284,13 +507,12 @@ def render_operator_trends(engine):
     filtered = filter_operator_data_by_month_range(operator_data, start_month, end_month)
     if filtered.empty:
         st.warning("No operator data in the selected range.")
-        return None
+        return
 
     top_n_ops = st.slider("Top N operators to show", min_value=3, max_value=30, value=5)
 
     agg = compute_operator_aggregates(filtered)
-    total_defects = int(agg["defect_count"].sum()) if not agg.empty else 0
-    total_scrap = int(agg["scrap_count"].sum()) if not agg.empty else 0
+    total_defects, total_scrap = (int(v) for v in agg[["defect_count", "scrap_count"]].to_numpy().sum(axis=0)) if not agg.empty else (0, 0)
     overall_scrap_rate = (total_scrap / total_defects * 100) if total_defects > 0 else 0.0
 
     # KPI row
@@ -299,79 +521,85 @@ def render_operator_trends(engine):
     c2.metric("Total Scrap (selected)", f"{total_scrap:,}")
     c3.metric("Overall Scrap Rate", f"{overall_scrap_rate:.1f}%")
 
-    st.markdown("#### 🔝 Top Operators by Total Defects (selected range)")
     display_table = agg.rename(columns={"operator_id": "Operator", "defect_count": "Total Defects", "scrap_count": "Scrap Count", "scrap_rate": "Scrap Rate (%)"})
-    st.dataframe(display_table.head(top_n_ops), use_container_width=True)
+    # collapsed by default so the table is only sent to the browser when opened
+    with st.expander("🔝 Top Operators by Total Defects (selected range)", expanded=False):
+        st.dataframe(display_table.head(min(top_n_ops, 50)), use_container_width=True)
 
     # CSV download
-    csv_bytes = display_table.to_csv(index=False).encode("utf-8")
+    csv_bytes = to_csv_bytes(display_table)
     st.download_button(label="Download Top Operators CSV", data=csv_bytes, file_name=f"top_operators_{start_month.strftime('%Y%m')}_{end_month.strftime('%Y%m')}.csv", mime="text/csv")
 
     # plots
-    fig_def, fig_scrap, fig_top = build_operator_plots(filtered, agg, top_n=top_n_ops)
+    def_json, scrap_json = _operator_plots_json(filtered, agg, top_n_ops)
 
     st.subheader("📈 Monthly Defects per Operator")
-    if fig_def:
-        st.plotly_chart(fig_def, use_container_width=True)
+    if def_json:
+        st.plotly_chart(pio.from_json(def_json), use_container_width=True, key="operator_defects_chart")
     else:
         st.info("No monthly defect series to display.")
 
     st.subheader("📉 Monthly Scrap Rate (%) per Operator")
-    if fig_scrap:
-        st.plotly_chart(fig_scrap, use_container_width=True)
+    if scrap_json:
+        st.plotly_chart(pio.from_json(scrap_json), use_container_width=True, key="operator_scrap_chart")
     else:
         st.info("No scrap rate series to display.")
 
 
-
-    # Return nothing (UI is rendered). get_top_operators_section can be used by exports.
-    return None
+# ------------------------ Advanced analysis --------------------------------
+# Truncation unit and look-back window per granularity
+_PERIOD_WINDOWS = {
+    "Daily": ("day", "30 days"),
+    "Weekly": ("week", "12 weeks"),
+    "Monthly": ("month", "12 months"),
+}
+
+# Period totals rolled up from the nightly quality.mv_daily_defects view
+_PERIOD_MV_QUERY = text("""
+SELECT
+    DATE_TRUNC(:unit, day)::date AS period,
+    SUM(total_defects)::bigint AS total_defects,
+    SUM(scrap_count)::bigint AS scrap_count
+FROM quality.mv_daily_defects
+WHERE day >= CURRENT_DATE - CAST(:window AS interval)
+GROUP BY 1
+ORDER BY period ASC
+""")
+
+# Base-table equivalent, used when the materialized view is unavailable
+_PERIOD_QUERY = text("""
+SELECT
+    DATE_TRUNC(:unit, date)::date AS period,
+    COUNT(*) AS total_defects,
+    COUNT(*) FILTER (WHERE UPPER(disposition) = 'SCRAP') AS scrap_count
+FROM quality.clean_quality_data
+WHERE date >= CURRENT_DATE - CAST(:window AS interval)
+GROUP BY 1
+ORDER BY period ASC
+""")
+
+
+@st.cache_data(**_QUERY_CACHE)
+def _fetch_period_trend(engine, view: str) -> pd.DataFrame:
+    """Defect/scrap totals per period for the Daily/Weekly/Monthly view."""
+    unit, window = _PERIOD_WINDOWS.get(view, _PERIOD_WINDOWS["Monthly"])
+    params = {"unit": unit, "window": window}
+    try:
+        return read_sql(_PERIOD_MV_QUERY, engine, params=params, parse_dates=["period"])
+    except Exception:
+        return read_sql(_PERIOD_QUERY, engine, params=params, parse_dates=["period"])
 
 
-# ------------------------ Advanced analysis --------------------------------
+@st.fragment
 def render_performance_trends(engine):
-    """Daily/Weekly/Monthly defect + scrap time-trends view."""
+    """Daily/Weekly/Monthly defect + scrap time-trends view (fragment: the granularity selectbox reruns only this tab)."""
     st.markdown("### 📊 Performance Trends")
     st.info("Analyze defects and scrap rate trends by time period")
 
     view = st.selectbox("Select time granularity:", ["Daily", "Weekly", "Monthly"], index=2)
 
-    if view == "Daily":
-        query = """
-        SELECT
-            DATE(date) AS period,
-            COUNT(*) AS total_defects,
-            COUNT(CASE WHEN UPPER(disposition) = 'SCRAP' THEN 1 END) AS scrap_count
-        FROM quality.clean_quality_data
-        WHERE date >= CURRENT_DATE - INTERVAL '30 days'
-        GROUP BY DATE(date)
-        ORDER BY period ASC
-        """
-    elif view == "Weekly":
-        query = """
-        SELECT
-            DATE_TRUNC('week', date)::date AS period,
-            COUNT(*) AS total_defects,
-            COUNT(CASE WHEN UPPER(disposition) = 'SCRAP' THEN 1 END) AS scrap_count
-        FROM quality.clean_quality_data
-        WHERE date >= CURRENT_DATE - INTERVAL '12 weeks'
-        GROUP BY DATE_TRUNC('week', date)::date
-        ORDER BY period ASC
-        """
-    else:
-        query = """
-        SELECT
-            DATE_TRUNC('month', date)::date AS period,
-            COUNT(*) AS total_defects,
-            COUNT(CASE WHEN UPPER(disposition) = 'SCRAP' THEN 1 END) AS scrap_count
-        FROM quality.clean_quality_data
-        WHERE date >= CURRENT_DATE - INTERVAL '12 months'
-        GROUP BY DATE_TRUNC('month', date)::date
-        ORDER BY period ASC
-        """
-
     try:
-        df = pd.read_sql(query, engine)
+        df = _fetch_period_trend(engine, view)
     except Exception as e:
         st.error(f"Error fetching performance data: {e}")
         return None
@@ -380,28 +608,24 @@ def render_performance_trends(engine):
         st.info("No performance data available for the selected range.")
         return None
 
-    df["period"] = pd.to_datetime(df["period"])
-    df = df.sort_values("period")
-    df["scrap_rate"] = (df["scrap_count"] / df["total_defects"] * 100).round(2)
+    # bounded counts/rates: int32/float32 halve the bytes carried into the chart payloads
+    df = df.sort_values("period").astype({"total_defects": "int32", "scrap_count": "int32"})
+    # unrounded: the KPI, Altair tooltip and plotly axis all format to 1 decimal at display time
+    df["scrap_rate"] = (df["scrap_count"] / df["total_defects"] * 100).astype("float32")
 
-    # KPIs for latest vs previous average
-    if len(df) > 1:
-        latest = df.iloc[-1]
-        avg_prev = df.iloc[:-1].mean(numeric_only=True)
-    else:
-        latest = df.iloc[0]
-        avg_prev = latest
+    # KPIs for latest vs previous average (columns: total_defects, scrap_count, scrap_rate)
+    kpis = df[["total_defects", "scrap_count", "scrap_rate"]].to_numpy(dtype="float64")
+    latest = kpis[-1]
+    deltas = latest - kpis[:-1].mean(axis=0) if len(kpis) > 1 else np.zeros(3)
 
     c1, c2, c3, c4 = st.columns(4)
     with c1:
-        delta = latest["total_defects"] - avg_prev["total_defects"] if len(df) > 1 else 0
-        st.metric("Defects", f"{int(latest['total_defects']):,}", f"{delta:+.0f} vs avg")
+        st.metric("Defects", f"{int(latest[0]):,}", f"{deltas[0]:+.0f} vs avg")
     with c2:
-        delta = latest["scrap_count"] - avg_prev["scrap_count"] if len(df) > 1 else 0
-        st.metric("Scrap", f"{int(latest['scrap_count']):,}", f"{delta:+.0f} vs avg")
+        st.metric("Scrap", f"{int(latest[1]):,}", f"{deltas[1]:+.0f} vs avg")
     with c3:
-        delta = latest["scrap_rate"] - avg_prev["scrap_rate"] if len(df) > 1 else 0
-        st.metric("Scrap Rate", f"{latest['scrap_rate']:.1f}%", f"{delta:+.1f}% vs avg")
+        delta = deltas[2]
+        st.metric("Scrap Rate", f"{latest[2]:.1f}%", f"{delta:+.1f}% vs avg")
     with c4:
         trend = "📈 Worse" if delta > 0 else "📉 Better" if len(df) > 1 else "➡️ Stable"
         st.metric("Trend Direction", trend)
@@ -410,18 +634,16 @@ def render_performance_trends(engine):
     try:
         import altair as alt
 
-        if view == "Daily":
-            df["period_display"] = df["period"].dt.strftime("%Y-%m-%d")
-        elif view == "Weekly":
-            df["period_display"] = df["period"].dt.strftime("Week of %Y-%m-%d")
-        else:
-            df["period_display"] = df["period"].dt.strftime("%b %Y")
+        # tooltip dates are formatted client-side by vega-lite (no per-row strftime)
+        tooltip_format = {"Daily": "%Y-%m-%d", "Weekly": "Week of %Y-%m-%d"}.get(view, "%b %Y")
 
-        scrap_chart = alt.Chart(df).mark_line(point=True, strokeWidth=3, color="red").encode(
+        # only ship the encoded columns in the vega-lite dataset
+        chart_df = df[["period", "total_defects", "scrap_count", "scrap_rate"]]
+        scrap_chart = alt.Chart(chart_df).mark_line(point=True, strokeWidth=3, color="red").encode(
             x=alt.X("period:T", title=view, axis=alt.Axis(format="%b %d" if view == "Daily" else "%b %Y")),
             y=alt.Y("scrap_rate:Q", title="Scrap Rate (%)", scale=alt.Scale(zero=True)),
             tooltip=[
-                alt.Tooltip("period_display:N", title="Date"),
+                alt.Tooltip("period:T", title="Date", format=tooltip_format),
                 alt.Tooltip("total_defects:Q", title="Defect Count", format=",.0f"),
                 alt.Tooltip("scrap_count:Q", title="Scrap Count", format=",.0f"),
                 alt.Tooltip("scrap_rate:Q", title="Scrap Rate %", format=".1f"),
@@ -431,50 +653,40 @@ def render_performance_trends(engine):
         st.altair_chart(scrap_chart, use_container_width=True)
     except Exception:
         # fallback: simple plotly
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=df["period"], y=df["scrap_rate"], mode="lines+markers", name="Scrap Rate", line=dict(color="red")))
-        fig.update_layout(title=f"{view} Scrap Rate Trend", xaxis_title=view, yaxis_title="Scrap Rate (%)", height=400)
-        fig.update_xaxes(type="date", tickformat="%b %Y")
-        st.plotly_chart(fig, use_container_width=True)
+        fig = go.Figure(
+            data=[go.Scatter(x=df["period"], y=df["scrap_rate"], mode="lines+markers", name="Scrap Rate", line=dict(color="red"), hovertemplate="%{x}<br>Scrap Rate: %{y:.1f}%<extra></extra>")],
+            layout=go.Layout(title=f"{view} Scrap Rate Trend", xaxis=dict(title=view, type="date", tickformat="%b %Y"), yaxis=dict(title="Scrap Rate (%)", tickformat=".1f"), height=400, uirevision="performance"),
+        )
+        st.plotly_chart(fig, use_container_width=True, key="performance_chart")
 
 
 # ------------------------ Advanced analysis --------------------------------
-def render_advanced_analysis(engine):
-    """Several advanced SQL-driven analyses kept compact and readable."""
-    st.markdown("### 🔍 Advanced Quality Analysis")
+HEATMAP_TILE = 20  # max operators / machines shown on the heatmap axes
 
-    # Operator-machine combinations heatmap
+
+@st.cache_data(**_QUERY_CACHE)
+def _fetch_operator_machine(engine) -> pd.DataFrame:
+    """Top operator/defect/machine combinations over the last 30 days."""
     operator_query = """
     SELECT
         who_made_it as operator_id,
         code_description as defect,
         machine_no,
         COUNT(*) as defect_count,
-        COUNT(CASE WHEN disposition = 'SCRAP' THEN 1 END) as scrap_count
+        COUNT(*) FILTER (WHERE UPPER(disposition) = 'SCRAP') as scrap_count
     FROM quality.clean_quality_data
     WHERE date >= CURRENT_DATE - INTERVAL '30 days'
     GROUP BY 1,2,3
     ORDER BY 4 DESC
     LIMIT 50
     """
-    try:
-        operator_data = pd.read_sql(operator_query, engine)
-    except Exception as e:
-        st.error(f"Advanced analysis query failed: {e}")
-        return None
-
-    if not operator_data.empty:
-        pivot = operator_data.pivot_table(index="operator_id", columns="machine_no", values="defect_count", aggfunc="sum").fillna(0)
-        if not pivot.empty and len(pivot) > 1:
-            fig = px.imshow(pivot, title="Operator Defects by Machine", aspect="auto", color_continuous_scale="Reds")
-            st.plotly_chart(fig, use_container_width=True)
+    df = read_sql(operator_query, engine)
+    return df.astype({"operator_id": "category", "defect": "category", "machine_no": "category"})
 
-        display_data = operator_data.head(15)[["operator_id", "machine_no", "defect", "defect_count", "scrap_count"]].copy()
-        display_data["scrap_rate"] = (display_data["scrap_count"] / display_data["defect_count"] * 100).round(1)
-        st.markdown("**Top Operator-Machine Combinations**")
-        st.dataframe(display_data, use_container_width=True)
 
-    # Top defective machines
+@st.cache_data(**_QUERY_CACHE)
+def _fetch_machine_defects(engine) -> pd.DataFrame:
+    """Top machine/defect pairs over the last 30 days."""
     machine_query = """
     SELECT
         machine_no,
@@ -486,11 +698,81 @@ def render_advanced_analysis(engine):
     ORDER BY 3 DESC
     LIMIT 15
     """
+    return read_sql(machine_query, engine)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _operator_machine_heatmap_json(operator_data: pd.DataFrame) -> Optional[str]:
+    """Operator x machine heatmap as Plotly JSON, or None when there is nothing to show."""
+    # Only densify the tile that is actually displayed (top operators x top machines)
+    # both keys are categoricals: weighted bincount over their codes, and the tile mask is a code lookup
+    ops, machines = operator_data["operator_id"], operator_data["machine_no"]
+    top_ops = _top_counts(ops, HEATMAP_TILE, weights=operator_data["defect_count"]).index
+    top_machines = _top_counts(machines, HEATMAP_TILE, weights=operator_data["defect_count"]).index
+    op_keep = ops.cat.categories.isin(top_ops)
+    machine_keep = machines.cat.categories.isin(top_machines)
+    op_codes, machine_codes = ops.cat.codes.to_numpy(), machines.cat.codes.to_numpy()
+    tile = operator_data[(op_codes >= 0) & (machine_codes >= 0) & op_keep[op_codes] & machine_keep[machine_codes]]
+    pivot = tile.groupby(["operator_id", "machine_no"], observed=True)["defect_count"].sum().unstack("machine_no", fill_value=0)
+    if pivot.empty or len(pivot) <= 1:
+        return None
+    fig = px.imshow(pivot, title="Operator Defects by Machine", aspect="auto", color_continuous_scale="Reds")
+    fig.update_layout(uirevision="operator_machine")
+    return fig.to_json()
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _machine_sunburst_json(machine_data: pd.DataFrame) -> str:
+    """Machine -> defect sunburst as Plotly JSON."""
+    fig = px.sunburst(machine_data, path=["machine_no", "defect"], values="defect_count", title="Machine-Defect Relationship")
+    fig.update_layout(uirevision="machine_defect")
+    return fig.to_json()
+
+
+def _run_parallel(*calls):
+    """
+    Run independent (fn, *args) calls on worker threads and return their futures.
+    The script context is attached to each worker so the st.cache_data helpers behave as on the main thread.
+    """
+    ctx = get_script_run_ctx()
+
+    def _with_ctx(fn, *args):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fn(*args)
+
+    with ThreadPoolExecutor(max_workers=len(calls)) as pool:
+        return [pool.submit(_with_ctx, *call) for call in calls]
+
+
+def render_advanced_analysis(engine):
+    """Several advanced SQL-driven analyses kept compact and readable."""
+    st.markdown("### 🔍 Advanced Quality Analysis")
+
+    # the two 30-day aggregates are independent: overlap their DB round-trips
+    operator_future, machine_future = _run_parallel((_fetch_operator_machine, engine), (_fetch_machine_defects, engine))
+
+    # Operator-machine combinations heatmap
     try:
-        machine_data = pd.read_sql(machine_query, engine)
+        operator_data = operator_future.result()
+    except Exception as e:
+        st.error(f"Advanced analysis query failed: {e}")
+        return None
+
+    if not operator_data.empty:
+        heatmap_json = _operator_machine_heatmap_json(operator_data)
+        if heatmap_json is not None:
+            st.plotly_chart(pio.from_json(heatmap_json), use_container_width=True, key="operator_machine_chart")
+
+        display_data = operator_data.head(15)[["operator_id", "machine_no", "defect", "defect_count", "scrap_count"]].copy()
+        display_data["scrap_rate"] = (display_data["scrap_count"] / display_data["defect_count"] * 100).round(1)
+        with st.expander("Top Operator-Machine Combinations", expanded=False):
+            st.dataframe(display_data, use_container_width=True)
+
+    # Top defective machines
+    try:
+        machine_data = machine_future.result()
         if not machine_data.empty:
-            fig = px.sunburst(machine_data, path=["machine_no", "defect"], values="defect_count", title="Machine-Defect Relationship")
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(pio.from_json(_machine_sunburst_json(machine_data)), use_container_width=True, key="machine_defect_chart")
     except Exception:
         pass
 
@@ -501,21 +783,7 @@ def get_top_operators_section(engine, start_month: Optional[pd.Timestamp] = None
     Return (fig, df) for top operators between start_month and end_month.
     If start_month/end_month are None, operate on the full window available.
     """
-    df = fetch_operator_data(engine, months=36)
-    if df.empty:
-        return None, pd.DataFrame()
-
-    if start_month is None:
-        start_month = df["month"].min()
-    if end_month is None:
-        end_month = df["month"].max()
-
-    filtered = filter_operator_data_by_month_range(df, start_month, end_month)
-    if filtered.empty:
-        return None, pd.DataFrame()
-
-    agg = compute_operator_aggregates(filtered)
-    top_df = agg.head(top_n)
+    top_df = fetch_top_operators(engine, start_month, end_month, months=36, top_n=top_n)
     if top_df.empty:
         return None, top_df
 
@@ -2,6 +2,8 @@ import streamlit as st
 import pandas as pd
 from io import BytesIO
 from utils.sql import load_part_records
+from utils.export_utils import to_csv_bytes
+from utils.db_utils import read_sql
 
 def part_leaderboard(summary_df, top_n=15):
     """Display top parts leaderboard"""
@@ -20,7 +22,7 @@ def part_leaderboard(summary_df, top_n=15):
     display = display[show_cols].head(top_n)
     st.dataframe(display, use_container_width=True)
 
-    csv = display.to_csv(index=False)
+    csv = to_csv_bytes(display)
     st.download_button("📥 Download Top Parts CSV", csv, file_name="top_parts.csv")
 
 def part_detail_with_excel(engine=None, df=None):
@@ -39,7 +41,7 @@ def part_detail_with_excel(engine=None, df=None):
         try:
             # If engine is a DataFrame, compute top parts in-memory
             if isinstance(engine, pd.DataFrame):
-                top_parts = engine.groupby('part_number').size().reset_index(name='cnt').sort_values('cnt', ascending=False).head(200)
+                top_parts = engine['part_number'].value_counts().head(200).rename_axis('part_number').reset_index(name='cnt')
             else:
                 top_parts_q = """
                     SELECT part_number, COUNT(*) as cnt
@@ -48,7 +50,7 @@ def part_detail_with_excel(engine=None, df=None):
                     ORDER BY cnt DESC
                     LIMIT 200
                 """
-                top_parts = pd.read_sql(top_parts_q, con=engine)
+                top_parts = read_sql(top_parts_q, engine)
             if top_parts is None or top_parts.empty:
                 part_choices = []
             else:
@@ -82,21 +84,23 @@ def part_detail_with_excel(engine=None, df=None):
         st.warning("No records found for this part.")
         return
 
+    # one counting pass over the disposition column feeds both the metrics and the summary sheet
+    if 'disposition_norm' in p_df.columns:
+        disp_counts = p_df['disposition_norm'].value_counts()
+    elif 'disposition' in p_df.columns:
+        # stored dispositions are upper-case (ETL): count the raw values, then fold case on the few distinct labels
+        disp_counts = p_df['disposition'].value_counts()
+        disp_counts = disp_counts.groupby(disp_counts.index.astype(str).str.upper()).sum()
+    else:
+        disp_counts = pd.Series(dtype="int64")
+    scrap_count = int(disp_counts.get("SCRAP", 0))
+    repaired_count = int(disp_counts.get("REPAIRED", 0))
+
     # Display part summary
     col1, col2, col3, col4 = st.columns(4)
     with col1:
         st.metric("Total Records", f"{len(p_df):,}")
     with col2:
-        # safe disposition detection
-        if 'disposition_norm' in p_df.columns:
-            scrap_count = int((p_df['disposition_norm'] == "SCRAP").sum())
-            repaired_count = int((p_df['disposition_norm'] == "REPAIRED").sum())
-        elif 'disposition' in p_df.columns:
-            scrap_count = int((p_df['disposition'] == "Scrap").sum())
-            repaired_count = int((p_df['disposition'] == "Repaired").sum())
-        else:
-            scrap_count = 0
-            repaired_count = 0
         st.metric("Scrap Count", f"{scrap_count:,}")
     with col3:
         st.metric("Repaired Count", f"{repaired_count:,}")
@@ -106,21 +110,25 @@ def part_detail_with_excel(engine=None, df=None):
 
     # Excel export
     buffer = BytesIO()
-    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
+    # strings_to_urls off: free-text cells skip the per-string URL regex.
+    # (No constant_memory: to_excel writes column by column, and that mode drops writes to flushed rows.)
+    with pd.ExcelWriter(buffer, engine="xlsxwriter", engine_kwargs={"options": {"strings_to_urls": False}}) as writer:
         if 'date' in p_df.columns:
             try:
-                p_df['date'] = pd.to_datetime(p_df['date'], errors='coerce')
+                if not pd.api.types.is_datetime64_any_dtype(p_df['date']):
+                    p_df['date'] = pd.to_datetime(p_df['date'], errors='coerce')
                 p_df.sort_values("date", ascending=False).to_excel(writer, sheet_name="records", index=False)
             except Exception:
                 p_df.to_excel(writer, sheet_name="records", index=False)
         else:
             p_df.to_excel(writer, sheet_name="records", index=False)
 
-        summary = pd.DataFrame({
-            "metric": ["total_records", "scrap_count", "repaired_count", "scrap_rate_percent"],
-            "value": [len(p_df), scrap_count, repaired_count, scrap_rate],
-        })
-        summary.to_excel(writer, sheet_name="summary", index=False)
+        # four static rows: write them directly instead of building a DataFrame
+        summary_ws = writer.book.add_worksheet("summary")
+        summary_ws.write_row(0, 0, ["metric", "value"])
+        summary_items = [("total_records", len(p_df)), ("scrap_count", scrap_count), ("repaired_count", repaired_count), ("scrap_rate_percent", scrap_rate)]
+        for i, item in enumerate(summary_items, start=1):
+            summary_ws.write_row(i, 0, item)
 
     buffer.seek(0)
     st.download_button(
@@ -13,7 +13,10 @@ Notes:
   - If logo_path is a URL, the helper will try to fetch it via requests (if available). If requests isn't available,
     pass a local path or bytes.
 """
+import hashlib
 import io
+import threading
+from collections import OrderedDict
 from datetime import datetime
 
 import pandas as pd
@@ -40,13 +43,36 @@ try:
 except Exception:
     HAS_REQUESTS = False
 
-# pillow used indirectly by python-pptx for some image operations; we don't need to import directly here
+# pillow: python-pptx uses it for image insertion; here it also shrinks chart PNGs before embedding
 try:
-    from PIL import Image as PILImage  # noqa: F401
+    from PIL import Image as PILImage
     HAS_PIL = True
 except Exception:
+    PILImage = None
     HAS_PIL = False
 
+# kaleido 0.x (the line supported by the pinned plotly 5.15) starts its Chromium process lazily on
+# the first to_image call and reuses it afterwards; nothing is launched at import time
+try:
+    import kaleido  # noqa: F401
+    import plotly.io as pio
+    if getattr(pio, "kaleido", None) is not None and pio.kaleido.scope is not None:
+        pio.kaleido.scope.mathjax = None  # skip the MathJax CDN fetch on first render
+    HAS_KALEIDO = True
+except Exception:
+    HAS_KALEIDO = False
+
+# matplotlib renders simple bar/line charts in-process, without a browser. Each render builds its own
+# Figure on an Agg canvas (no pyplot global state), so concurrent sessions do not share figures.
+try:
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    HAS_MPL = True
+except Exception:
+    Figure = None
+    FigureCanvasAgg = None
+    HAS_MPL = False
+
 
 def _hex_to_rgb_tuple(hex_color: str):
     hex_color = (hex_color or "#2C3E50").lstrip("#")
@@ -55,6 +81,165 @@ def _hex_to_rgb_tuple(hex_color: str):
     return tuple(int(hex_color[i : i + 2], 16) for i in (0, 2, 4))
 
 
+def _render_png_mpl(fig, width=1400, height=700, dpi=100):
+    """
+    Render a plotly figure made only of bar/scatter traces to PNG with matplotlib.
+    Returns None for anything else (heatmaps, sunbursts, ...) so the caller can use kaleido.
+    """
+    if not HAS_MPL or not fig.data or any(t.type not in ("bar", "scatter") for t in fig.data):
+        return None
+    mfig = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+    FigureCanvasAgg(mfig)
+    ax = mfig.add_subplot()
+    try:
+        ax2 = None
+        for t in fig.data:
+            target = ax
+            if getattr(t, "yaxis", None) == "y2":
+                ax2 = ax2 or ax.twinx()
+                target = ax2
+            x = list(t.x) if t.x is not None else []
+            y = list(t.y) if t.y is not None else []
+            if t.type == "bar":
+                color = t.marker.color if t.marker and t.marker.color is not None else None
+                if t.orientation == "h":
+                    target.barh([str(v) for v in y], x, color=color, label=t.name)
+                else:
+                    target.bar([str(v) for v in x], y, color=color, label=t.name)
+            else:
+                color = t.line.color if t.line and t.line.color else None
+                marker = "o" if t.mode and "markers" in t.mode else None
+                target.plot(x, y, color=color, marker=marker, label=t.name)
+        layout = fig.layout
+        if layout.title and layout.title.text:
+            ax.set_title(layout.title.text)
+        if layout.xaxis and layout.xaxis.title and layout.xaxis.title.text:
+            ax.set_xlabel(layout.xaxis.title.text)
+        if layout.yaxis and layout.yaxis.title and layout.yaxis.title.text:
+            ax.set_ylabel(layout.yaxis.title.text)
+        if layout.yaxis and layout.yaxis.autorange == "reversed":
+            ax.invert_yaxis()
+        # fixed secondary range, e.g. the Pareto cumulative-% axis pinned to 0-100
+        if ax2 is not None and layout.yaxis2 and layout.yaxis2.range is not None:
+            ax2.set_ylim(*layout.yaxis2.range)
+        if len(fig.data) > 1:
+            ax.legend(loc="upper left", fontsize=8)
+        ax.tick_params(axis="x", labelrotation=45, labelsize=8)
+        mfig.tight_layout()
+        buf = io.BytesIO()
+        mfig.savefig(buf, format="png", dpi=dpi)
+        return buf.getvalue()
+    except Exception:
+        return None
+
+
+def _render_png_kaleido(fig, width=1400, height=700):
+    """
+    PNG bytes via plotly/kaleido (to_image, then write_image), or None.
+    Server-side rendering is for the PPTX export only; in-page charts go to the browser as
+    figure JSON through st.plotly_chart and are drawn by Plotly.js.
+    """
+    try:
+        return fig.to_image(format="png", width=width, height=height)
+    except Exception:
+        try:
+            buf = io.BytesIO()
+            fig.write_image(buf, format="png", width=width, height=height)
+            return buf.getvalue()
+        except Exception:
+            return None
+
+
+# rendered PNGs keyed by (figure JSON digest, width, height); re-exports of unchanged charts skip rendering
+_PNG_CACHE_SIZE = 64
+_png_cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+_png_cache_lock = threading.Lock()
+
+
+def _compress_png(png: bytes) -> bytes:
+    """
+    Re-encode a chart PNG as an optimized 256-colour palette PNG (charts use few colours).
+    Returns the original bytes if Pillow is missing, encoding fails or the result is not smaller.
+    """
+    if not HAS_PIL or not png:
+        return png
+    try:
+        img = PILImage.open(io.BytesIO(png)).convert("RGB")
+        buf = io.BytesIO()
+        img.quantize(colors=256, method=PILImage.Quantize.MEDIANCUT).save(buf, format="PNG", optimize=True)
+        small = buf.getvalue()
+        return small if len(small) < len(png) else png
+    except Exception:
+        return png
+
+
+def _png_cache_key(fig, width, height):
+    try:
+        return hashlib.sha1(fig.to_json().encode("utf-8")).hexdigest(), width, height
+    except Exception:
+        return None
+
+
+def _render_pngs(plots: dict, width=1400, height=700, on_progress=None) -> dict:
+    """
+    PNG bytes per plot title. Cached images are reused; matplotlib renders in-process on a
+    per-call Figure/Agg canvas and the remaining figures go to kaleido one at a time: its single
+    Chromium process is not safe to drive from several threads (and kaleido 0.x serializes calls
+    on its pipe anyway).
+    on_progress(i, n, title) is called as each image becomes available.
+    """
+    n = len(plots)
+    done = 0
+
+    def _report(p_title):
+        nonlocal done
+        done += 1
+        if on_progress is not None:
+            on_progress(done, n, p_title)
+
+    keys = {p_title: _png_cache_key(fig, width, height) for p_title, fig in plots.items()}
+    with _png_cache_lock:
+        pngs = {}
+        for p_title, key in keys.items():
+            if key is not None and key in _png_cache:
+                _png_cache.move_to_end(key)
+                pngs[p_title] = _png_cache[key]
+    cached = set(pngs)
+    for p_title in cached:
+        _report(p_title)
+    for p_title, fig in plots.items():
+        if p_title not in pngs:
+            pngs[p_title] = _render_png_mpl(fig, width=width, height=height)
+            if pngs[p_title] is not None:
+                _report(p_title)
+    for p_title in [p_title for p_title, png in pngs.items() if png is None]:
+        pngs[p_title] = _render_png_kaleido(plots[p_title], width, height)
+        _report(p_title)
+    # freshly rendered images are shrunk once; cached entries are stored already compressed
+    for p_title in pngs.keys() - cached:
+        pngs[p_title] = _compress_png(pngs[p_title])
+    with _png_cache_lock:
+        for p_title, png in pngs.items():
+            if png and keys[p_title] is not None:
+                _png_cache[keys[p_title]] = png
+                _png_cache.move_to_end(keys[p_title])
+        while len(_png_cache) > _PNG_CACHE_SIZE:
+            _png_cache.popitem(last=False)
+    return pngs
+
+
+def _set_cell(cell, text, size, name, bold=None, rgb=None):
+    """Write a single-paragraph cell and style that paragraph once."""
+    cell.text = text
+    font = cell.text_frame.paragraphs[0].font
+    font.size = size
+    font.name = name
+    if bold is not None:
+        font.bold = bold
+    if rgb is not None:
+        font.color.rgb = rgb
+
+
 def _get_logo_bytes(logo_path_or_url):
     if not logo_path_or_url:
         return None
@@ -88,6 +273,7 @@ def create_pretty_pptx(
     accent_color: str = "#FF9900",
     title_font: str = "Calibri",
     body_font: str = "Calibri",
+    on_progress=None,
 ) -> bytes | None:
     """
     Build a styled PPTX:
@@ -95,6 +281,7 @@ def create_pretty_pptx(
       - Executive summary slide (bullets)
       - One slide per plot (chart image embedded)
       - One slide per table (top rows as PPTX table)
+    on_progress(i, n, title), if given, is called as each chart image is ready so callers can drive a progress bar.
     Returns bytes or None if prerequisites missing.
     """
     if not HAS_PPTX:
@@ -177,8 +364,9 @@ def create_pretty_pptx(
         p.font.size = Pt(13)
         p.font.color.rgb = RGBColor(*brand_rgb)
 
-    # Plot slides
-    for p_title, fig in plots.items():
+    # Plot slides: all chart images are rendered up front, then inserted in order
+    pngs = _render_pngs(plots, width=1400, height=700, on_progress=on_progress)
+    for p_title in plots:
         s_layout = prs.slide_layouts[5] if len(prs.slide_layouts) > 5 else prs.slide_layouts[1]
         s = prs.slides.add_slide(s_layout)
         try:
@@ -187,16 +375,7 @@ def create_pretty_pptx(
                 s.shapes.title.text_frame.paragraphs[0].font.color.rgb = RGBColor(*brand_rgb)
         except Exception:
             pass
-        # Try to render chart to PNG bytes - prefer plotly.kaleido via fig.to_image
-        try:
-            png = fig.to_image(format="png", width=1400, height=700)
-        except Exception:
-            try:
-                buf = io.BytesIO()
-                fig.write_image(buf, format="png", width=1400, height=700)
-                png = buf.getvalue()
-            except Exception:
-                png = None
+        png = pngs.get(p_title)
         if png:
             try:
                 img_buf = io.BytesIO(png)
@@ -213,8 +392,8 @@ def create_pretty_pptx(
     for t_title, table in tables.items():
         if not isinstance(table, pd.DataFrame) or table.empty:
             continue
-        tbl = table.copy()
-        rows = min(10, len(tbl))
+        tbl = table.head(10)
+        rows = len(tbl)
         cols = len(tbl.columns)
         # create slide
         s_layout = prs.slide_layouts[5] if len(prs.slide_layouts) > 5 else prs.slide_layouts[1]
@@ -232,29 +411,21 @@ def create_pretty_pptx(
             width = Inches(9.0)
             height = Inches(5.0)
             table_shape = s.shapes.add_table(rows + 1, cols, left, top, width, height).table
+            # cell strings come from one ndarray (no per-cell iloc); fonts/colours are built once
+            vals = tbl.astype(str).to_numpy()
+            header_size, body_size, header_rgb = Pt(12), Pt(11), RGBColor(*brand_rgb)
             # Header
             for c, col_name in enumerate(tbl.columns):
-                cell = table_shape.cell(0, c)
-                cell.text = str(col_name)
-                for paragraph in cell.text_frame.paragraphs:
-                    paragraph.font.bold = True
-                    paragraph.font.size = Pt(12)
-                    paragraph.font.name = body_font
-                    paragraph.font.color.rgb = RGBColor(*brand_rgb)
+                _set_cell(table_shape.cell(0, c), str(col_name), header_size, body_font, bold=True, rgb=header_rgb)
             # Data rows
             for r in range(rows):
-                for c, col_name in enumerate(tbl.columns):
-                    cell = table_shape.cell(r + 1, c)
-                    val = tbl.iloc[r, c]
-                    cell.text = str(val)
-                    for paragraph in cell.text_frame.paragraphs:
-                        paragraph.font.size = Pt(11)
-                        paragraph.font.name = body_font
+                for c in range(cols):
+                    _set_cell(table_shape.cell(r + 1, c), vals[r, c], body_size, body_font)
         except Exception:
             # fallback to bullet text
             tb = s.shapes.add_textbox(Inches(0.5), Inches(1.2), Inches(9.0), Inches(5.0))
             tf = tb.text_frame
-            for r in tbl.head(rows).to_dict("records"):
+            for r in tbl.to_dict("records"):
                 line = " • ".join([f"{k}: {v}" for k, v in r.items()])
                 p = tf.add_paragraph()
                 p.text = line
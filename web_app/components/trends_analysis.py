@@ -3,40 +3,20 @@ import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
-from utils.data_loader import load_data
+import plotly.io as pio
+from utils.data_loader import load_data, today_utc
+
 
 def time_trends(engine, days=30):
     """Display defect trends over time (robust to tz/dtype/aggregation issues)"""
     st.markdown("## 📈 Defect Trends Over Time")
     
-    # Load data with the specified days parameter
     if not hasattr(engine, "connect"):
         raise TypeError(f"Expected SQLAlchemy engine, got {type(engine)}")
 
-    with st.spinner('Loading trend data...'):
-        df = load_data(engine, days=days)
-    
-    if df is None or df.empty:
-        st.info("No data available for trend analysis.")
-        return
-    
-    # Work on a copy and normalize date column
-    df = df.copy()
-    # Coerce to datetimelike, drop rows that can't be parsed
-    df['date'] = pd.to_datetime(df['date'], errors='coerce')
-    # Remove timezone info (if present) to avoid comparison/coercion surprises
-    df['date'] = df['date'].dt.tz_localize(None, ambiguous='NaT', nonexistent='NaT')
-    df = df.dropna(subset=['date'])
-    if df.empty:
-        st.warning("No valid date data available after cleaning.")
-        return
-
-    # Create a normalized day column (datetime at midnight) to keep types consistent
-    df['date_day'] = df['date'].dt.floor('D')  # preserves as datetime64[ns]
-
-    # Date range selector: ensure default values are datetime.date objects
-    min_date = df['date_day'].min().date()
-    max_date = df['date_day'].max().date()
+    # Date range selector over the last `days` days; only the selected range is fetched
+    max_date = today_utc().date()
+    min_date = max_date - pd.Timedelta(days=int(days)).to_pytimedelta()
     date_range = st.date_input("Select Date Range", value=(min_date, max_date), min_value=min_date, max_value=max_date)
 
     # Normalize date_range input (st.date_input can return a single date or a tuple)
@@ -45,38 +25,67 @@ def time_trends(engine, days=30):
         end_date = pd.to_datetime(date_range[1]).normalize()
     else:
         # single date selected -> show that single day
-        start_date = pd.to_datetime(date_range).normalize()
+        start_date = pd.to_datetime(date_range[0] if isinstance(date_range, tuple) else date_range).normalize()
         end_date = start_date
 
-    # Filter using date_day (inclusive)
-    df = df[(df['date_day'] >= start_date) & (df['date_day'] <= end_date)]
+    with st.spinner('Loading trend data...'):
+        # only what the trend charts use: date (-> date_day) and disposition (-> disposition_norm)
+        df = load_data(engine, start=start_date.date(), end=end_date.date(), columns=("date", "disposition"))
+    
+    if df is None or df.empty:
+        st.info("No data available for trend analysis.")
+        return
+    
+    # st.cache_data hands back a fresh copy, so the frame can be normalized in place.
+    # load_data already returns a tz-naive datetime64 date and its date_day; only convert if that ever changes
+    if not pd.api.types.is_datetime64_any_dtype(df['date']):
+        df['date'] = pd.to_datetime(df['date'], errors='coerce', utc=True).dt.tz_convert(None)
+    elif getattr(df['date'].dt, 'tz', None) is not None:
+        df['date'] = df['date'].dt.tz_convert(None)
+    df = df.dropna(subset=['date'])
     if df.empty:
-        st.warning("No data in selected date range.")
+        st.warning("No valid date data available after cleaning.")
         return
 
+    # normalized day column (datetime at midnight): a single day-resolution cast of the raw array
+    if 'date_day' not in df.columns or not pd.api.types.is_datetime64_any_dtype(df['date_day']):
+        df['date_day'] = df['date'].to_numpy('datetime64[ns]').astype('datetime64[D]').astype('datetime64[ns]')
+    # ascending day order for the charts (load_data returns newest first)
+    if not df['date_day'].is_monotonic_increasing:
+        df = df.sort_values('date_day', kind='stable', ignore_index=True)
+
     st.sidebar.info(f"📅 Analyzing last {days} days of data (showing {start_date.date()} → {end_date.date()})")
 
+    # per-day counts are shared by the trend chart and the summary (one hashed value_counts pass)
+    daily_counts = df['date_day'].value_counts(sort=False).sort_index().rename('defect_count')
+
     # Daily defect trend
-    render_daily_trend(df)
+    render_daily_trend(df, daily_counts)
 
     # Disposition trend (if disposition_norm exists)
     if 'disposition_norm' in df.columns:
         render_disposition_trend(df)
 
     # Trend summary
-    render_trend_summary(df)
+    render_trend_summary(df, daily_counts)
 
 
-def render_daily_trend(df):
+def render_daily_trend(df, daily_counts=None):
     """Render daily defect trend chart (uses date_day datetime index, sorted)"""
-    # Aggregate by normalized day
-    daily_trend = df.groupby('date_day').size().rename('defect_count').reset_index()
-    # Ensure sorting by date
-    daily_trend = daily_trend.sort_values('date_day').reset_index(drop=True)
+    # Aggregate by normalized day (unless the caller already did)
+    if daily_counts is None:
+        daily_counts = df['date_day'].value_counts(sort=False).sort_index().rename('defect_count')
+    # counts are sorted by day and date_day is already datetime64: no re-sort / re-parse
+    daily_trend = daily_counts.rename('defect_count').reset_index()
 
-    # Convert date_day to proper datetime for plotting
-    daily_trend['date_day'] = pd.to_datetime(daily_trend['date_day'])
+    # figure is built/serialized once per distinct daily series and rehydrated on reruns
+    fig_daily = pio.from_json(_daily_trend_figure_json(daily_trend))
+    st.plotly_chart(fig_daily, use_container_width=True, key='daily_trend_chart')
 
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _daily_trend_figure_json(daily_trend):
+    """Daily defect line + 7-day moving average as Plotly JSON."""
     fig_daily = go.Figure()
     fig_daily.add_trace(go.Scatter(
         x=daily_trend['date_day'],
@@ -88,9 +97,14 @@ def render_daily_trend(df):
         hovertemplate='<b>%{x|%Y-%m-%d}</b><br>Defects: %{y}<extra></extra>'
     ))
 
-    # Add 7-day moving average (computed on sorted series)
+    # Add 7-day trailing moving average (computed on sorted series); matches
+    # rolling(window=7, min_periods=1).mean() via a cumulative-sum difference
     if len(daily_trend) >= 1:
-        daily_trend['moving_avg'] = daily_trend['defect_count'].rolling(window=7, min_periods=1).mean()
+        counts = daily_trend['defect_count'].to_numpy(np.float64)
+        csum = np.cumsum(counts)
+        window_sum = csum.copy()
+        window_sum[7:] -= csum[:-7]
+        daily_trend['moving_avg'] = window_sum / np.minimum(np.arange(1, len(counts) + 1), 7)
         fig_daily.add_trace(go.Scatter(
             x=daily_trend['date_day'],
             y=daily_trend['moving_avg'],
@@ -107,47 +121,35 @@ def render_daily_trend(df):
         yaxis_title="Defect Count",
         hovermode='x unified',
         showlegend=True,
-        height=420
+        height=420,
+        uirevision='daily_trend'
     )
-    st.plotly_chart(fig_daily, use_container_width=True)
+    return fig_daily.to_json()
 
 
 def render_disposition_trend(df):
-    """Render disposition trend chart. Pivot to ensure zero-fill for missing dates/dispositions."""
-    # Aggregate counts per day and disposition
-    disposition_trend = (
-        df.groupby(['date_day', 'disposition_norm'])
-          .size()
-          .rename('count')
-          .reset_index()
-    )
+    """Render disposition trend chart. Day x disposition table is zero-filled for missing dates/dispositions."""
+    # one groupby pass straight into a zero-filled day x disposition table (sorted by day)
+    counts = df.groupby(['date_day', 'disposition_norm'], observed=True).size().unstack('disposition_norm', fill_value=0)
 
-    if disposition_trend.empty:
+    if counts.empty:
         st.info("No disposition data to show.")
         return
 
-    # Pick top dispositions across the selected range by total count
-    top_dispositions = (
-        disposition_trend.groupby('disposition_norm')['count']
-        .sum()
-        .nlargest(3)
-        .index
-        .tolist()
-    )
+    # Pick top dispositions across the selected range by total count (column sums of the table)
+    top_dispositions = counts.sum().nlargest(3).index
+    wide = counts[top_dispositions]
 
-    disposition_trend = disposition_trend[disposition_trend['disposition_norm'].isin(top_dispositions)]
+    fig_disp = pio.from_json(_disposition_trend_figure_json(wide))
+    st.plotly_chart(fig_disp, use_container_width=True, key='disposition_trend_chart')
 
-    # Pivot so every date has an entry for each disposition (missing -> 0)
-    pivot = disposition_trend.pivot_table(index='date_day', columns='disposition_norm', values='count', aggfunc='sum').fillna(0)
-    pivot = pivot.sort_index()
-    # Melt back for plotly express (ensures x is datetime and series are continuous)
-    plot_df = pivot.reset_index().melt(id_vars='date_day', var_name='disposition', value_name='count')
 
+@st.cache_data(show_spinner=False, max_entries=32)
+def _disposition_trend_figure_json(wide):
+    """Stacked disposition area chart (wide-form: date_day index, one column per disposition) as Plotly JSON."""
     fig_disp = px.area(
-        plot_df,
-        x='date_day',
-        y='count',
-        color='disposition',
+        wide,
+        labels={'disposition_norm': 'disposition', 'value': 'count'},
         title="🔄 Disposition Trend Over Time",
         color_discrete_sequence=px.colors.qualitative.Set2
     )
@@ -157,20 +159,22 @@ def render_disposition_trend(df):
         xaxis_title="Date",
         yaxis_title="Count",
         hovermode='x unified',
-        height=420
+        height=420,
+        uirevision='disposition_trend'
     )
-    st.plotly_chart(fig_disp, use_container_width=True)
+    return fig_disp.to_json()
 
 
-def render_trend_summary(df):
+def render_trend_summary(df, daily_counts=None):
     """Render trend summary statistics"""
     st.markdown("### 📊 Trend Summary")
 
     # Use date_day for day-based stats
-    daily_counts = df.groupby('date_day').size().rename('count').reset_index()
+    if daily_counts is None:
+        daily_counts = df['date_day'].value_counts(sort=False)
     total_defects = int(len(df))
-    avg_daily = float(daily_counts['count'].mean()) if not daily_counts.empty else 0.0
-    peak_day = int(daily_counts['count'].max()) if not daily_counts.empty else 0
+    avg_daily = float(daily_counts.mean()) if not daily_counts.empty else 0.0
+    peak_day = int(daily_counts.max()) if not daily_counts.empty else 0
     date_range_days = (df['date_day'].max().normalize() - df['date_day'].min().normalize()).days + 1
 
     col1, col2, col3, col4 = st.columns(4)
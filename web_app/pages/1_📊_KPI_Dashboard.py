@@ -10,17 +10,17 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(project_root)
 
 from components.kpi_dashboard import QualityApp
-from etl.utils.db_utils import get_target_engine
+from utils.db_utils import get_dashboard_engine
 
 def main():
     st.set_page_config(page_title="KPI Dashboard", layout="wide")
     
     try:
-        engine = get_target_engine()
+        engine = get_dashboard_engine()
 
 
         #st.sidebar.markdown("### Connection diagnostics")
-        #st.sidebar.write("get_target_engine() ->", repr(engine))
+        #st.sidebar.write("get_dashboard_engine() ->", repr(engine))
       #  st.sidebar.write("type(engine) ->", type(engine))
        # st.sidebar.write("is instance of pd.DataFrame ->", isinstance(engine, pd.DataFrame))
         #st.sidebar.write("has attr 'connect' ->", hasattr(engine, "connect"))
@@ -35,15 +35,17 @@ def main():
             except Exception:
                 return False
 
+        # the pooled engine pre-pings its connections; the explicit round-trip is opt-in, not per rerun
         if looks_like_engine(engine):
-            try:
-                with engine.connect() as conn:
-                    conn.execute(text("SELECT 1"))
-                st.sidebar.success("DB test query succeeded (SELECT 1)")
-            except Exception as ex:
-                st.sidebar.error(f"DB test query failed: {ex}")
+            if st.sidebar.checkbox("Run DB connection test", value=False):
+                try:
+                    with engine.connect() as conn:
+                        conn.execute(text("SELECT 1"))
+                    st.sidebar.success("DB test query succeeded (SELECT 1)")
+                except Exception as ex:
+                    st.sidebar.error(f"DB test query failed: {ex}")
         else:
-            st.sidebar.error("Engine does not look like a SQLAlchemy engine. Check get_target_engine() and callers.")
+            st.sidebar.error("Engine does not look like a SQLAlchemy engine. Check get_dashboard_engine() and callers.")
         app = QualityApp(engine)
         app.run()
         
@@ -7,14 +7,14 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(project_root)
 
 from components.trends_analysis import time_trends
-from etl.utils.db_utils import get_target_engine
+from utils.db_utils import get_dashboard_engine
 
 def main():
     st.set_page_config(page_title="Trends Analysis", layout="wide")
     st.title("📈 Trends Analysis")
     
     try:
-        engine = get_target_engine()
+        engine = get_dashboard_engine()
         
         # Add page-specific controls
         days = st.sidebar.selectbox(
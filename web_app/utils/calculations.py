@@ -1,39 +1,72 @@
+import numpy as np
 import pandas as pd
-from math import erf, sqrt
+import streamlit as st
+from math import erf, erfc, sqrt
+
+# Optional compiled erfc ufunc; falls back to math.erfc applied element-wise
+try:
+    from scipy.special import erfc as _erfc_ufunc
+    HAS_SCIPY = True
+except Exception:
+    _erfc_ufunc = np.vectorize(erfc, otypes=[np.float64])
+    HAS_SCIPY = False
 
 def normal_cdf(x: float) -> float:
     """Standard Normal CDF using error function"""
     return 0.5 * (1 + erf(x / sqrt(2)))
 
+def two_prop_z_test_arrays(x1, n1, x2, n2):
+    """
+    Vectorized two-proportion z-test (two-sided) over equal-length arrays.
+    Returns (z, p_value) float64 arrays; NaN where n1, n2 or the pooled standard error is zero.
+    """
+    x1, n1, x2, n2 = (np.asarray(a, dtype=np.float64) for a in (x1, n1, x2, n2))
+    z = np.full(n1.shape, np.nan)
+    valid = (n1 > 0) & (n2 > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p_pool = (x1 + x2) / (n1 + n2)
+        se = np.sqrt(p_pool * (1 - p_pool) * (1 / n1 + 1 / n2))
+        valid &= se > 0
+        np.divide(x1 / n1 - x2 / n2, se, out=z, where=valid)
+    # two-sided p = 2 * (1 - Phi(|z|)) = erfc(|z| / sqrt(2))
+    p_value = np.full(z.shape, np.nan)
+    if valid.any():
+        p_value[valid] = _erfc_ufunc(np.abs(z[valid]) / sqrt(2))
+    return z, p_value
+
 def two_prop_z_test(x1, n1, x2, n2):
     """Two-proportion z-test (two-sided). Returns z, p-value."""
-    if n1 == 0 or n2 == 0:
-        return None, None
-
-    p1 = x1 / n1
-    p2 = x2 / n2
-    p_pool = (x1 + x2) / (n1 + n2)
-    se = sqrt(p_pool * (1 - p_pool) * (1 / n1 + 1 / n2))
-    if se == 0:
+    z, p_value = two_prop_z_test_arrays([x1], [n1], [x2], [n2])
+    if np.isnan(z[0]):
         return None, None
-        
-    z = (p1 - p2) / se
-    p_value = 2 * (1 - normal_cdf(abs(z)))
-    return z, p_value
+    return float(z[0]), float(p_value[0])
 
+# st.cache_data hashes the DataFrame contents: reruns with an unchanged frame reuse the result
+@st.cache_data(show_spinner=False, max_entries=16)
 def summary_by_part(df):
     """Create part-level summary with defect counts and scrap rates"""
     if df.empty:
         return pd.DataFrame()
 
+    # low-cardinality keys grouped several times below: encode once, group on int codes
+    df = df.assign(**{
+        col: df[col].astype('category')
+        for col in ('part_number', 'disposition_norm')
+        if not isinstance(df[col].dtype, pd.CategoricalDtype)
+    })
+
     # Pivot table for part dispositions
     pivot = df.pivot_table(
         index='part_number', 
         columns='disposition_norm', 
         values='id', 
         aggfunc='count', 
-        fill_value=0
-    ).reset_index()
+        fill_value=0,
+        observed=True
+    )
+    pivot.columns = pivot.columns.astype(str)
+    pivot = pivot.reset_index()
+    pivot['part_number'] = pivot['part_number'].astype(str)
 
     # Ensure all disposition columns exist
     for col in ['SCRAP', 'REPAIRED', 'OK']:
@@ -45,17 +78,18 @@ def summary_by_part(df):
 
     # Top defect reasons per part
     reasons = (
-        df.groupby(['part_number', 'code_description'])
+        df.groupby(['part_number', 'code_description'], observed=True)
         .size()
         .reset_index(name='count')
-        .sort_values(['part_number', 'count'], ascending=[True, False])
+        .sort_values(['part_number', 'count'], ascending=[True, False], kind='stable')
     )
-    
+
+    # head(3) per part + vectorized label strings, joined per part (no per-group/per-row lambdas)
+    top3 = reasons.groupby('part_number', sort=False, observed=True).head(3)
+    labels = top3['code_description'].astype(str) + ' (' + top3['count'].astype(str) + ')'
     top_reasons = (
-        reasons.groupby('part_number')
-        .apply(lambda g: '; '.join(
-            g.head(3).apply(lambda r: f"{r['code_description']} ({r['count']})", axis=1)
-        ))
+        labels.groupby(top3['part_number'].astype(str), sort=False)
+        .agg('; '.join)
         .reset_index(name='top_reasons')
     )
 
@@ -63,21 +97,21 @@ def summary_by_part(df):
     summary['scrap_rate_percent'] = (summary['scrap_rate'] * 100).round(1)
     return summary.sort_values('total_defects', ascending=False)
 
+@st.cache_data(show_spinner=False, max_entries=16)
 def period_metrics(df, start_date, end_date):
     """Compute overall and per-part metrics for a period"""
     mask = (df['date'] >= pd.to_datetime(start_date)) & (df['date'] <= pd.to_datetime(end_date))
     period_df = df.loc[mask]
     
     total = len(period_df)
-    scrap = period_df[period_df['disposition_norm'] == 'SCRAP'].shape[0]
-    repaired = period_df[period_df['disposition_norm'] == 'REPAIRED'].shape[0]
+    is_scrap = period_df['disposition_norm'].eq('SCRAP')
+    scrap = int(is_scrap.sum())
+    repaired = int(period_df['disposition_norm'].eq('REPAIRED').sum())
 
+    # one boolean column grouped by part: size for totals (id is never null), sum for scrap
     per_part = (
-        period_df.groupby('part_number')
-        .agg(
-            total_defects=('id', 'count'), 
-            scrap_count=('disposition_norm', lambda s: (s == 'SCRAP').sum())
-        )
+        is_scrap.groupby(period_df['part_number'], observed=True)
+        .agg(total_defects='size', scrap_count='sum')
         .reset_index()
     )
     
@@ -1,5 +1,6 @@
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+import plotly.io as pio
 import pandas as pd
 import streamlit as st
 
@@ -10,6 +11,49 @@ PALETTE = {
     "light": "#f8f9fa", "dark": "#343a40"
 }
 
+# Static Pareto styling, built once at import; only data, title and x-axis title vary per chart
+_PARETO_BAR_KW = dict(
+    name='Defect Count',
+    marker_color=PALETTE['primary'],
+    opacity=0.8,
+    hovertemplate='<b>%{x}</b><br>Count: %{y}<extra></extra>'
+)
+_PARETO_LINE_KW = dict(
+    name='Cumulative %',
+    line=dict(color=PALETTE['danger'], width=3),
+    marker=dict(size=8, symbol='circle'),
+    hovertemplate='<b>%{x}</b><br>Cumulative: %{y}%<extra></extra>'
+)
+_PARETO_LAYOUT = dict(
+    template='plotly_white',
+    height=500,
+    showlegend=True,
+    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
+    font=dict(family="Arial, sans-serif", size=12),
+    plot_bgcolor='rgba(0,0,0,0)',
+    paper_bgcolor='rgba(0,0,0,0)',
+    margin=dict(t=80, l=60, r=60, b=80)
+)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _pareto_figure_json(title, xaxis_title, categories, counts, cumulative):
+    """Pareto bar + cumulative line as Plotly JSON; cached per title and (categories, counts, cumulative) tuples."""
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    fig.add_trace(go.Bar(x=categories, y=counts, **_PARETO_BAR_KW), secondary_y=False)
+    fig.add_trace(go.Scatter(x=categories, y=cumulative, **_PARETO_LINE_KW), secondary_y=True)
+    fig.update_layout(
+        title={'text': title, 'x': 0.5, 'xanchor': 'center', 'font': {'size': 20}},
+        xaxis_title=xaxis_title,
+        **_PARETO_LAYOUT
+    )
+    # categorical axis: labels are placed as given (numeric-looking part numbers are not treated as numbers)
+    fig.update_xaxes(type='category', tickangle=45, showgrid=False, tickfont=dict(size=11))
+    fig.update_yaxes(title_text="Defect Count", secondary_y=False)
+    fig.update_yaxes(title_text="Cumulative %", secondary_y=True, range=[0, 100])
+    return fig.to_json()
+
+
 def create_modern_pareto_chart(series, title, xaxis_title, top_n=20):
     """Create a modern, readable Pareto chart with robust error handling"""
     
@@ -24,8 +68,8 @@ def create_modern_pareto_chart(series, title, xaxis_title, top_n=20):
             # It's already a Series with index and values
             counts = series.head(top_n)
         elif hasattr(series, 'value_counts'):
-            # It's a Series that needs value_counts
-            counts = series.value_counts().head(top_n)
+            # It's a Series that needs value_counts: hash-count unsorted, then heap-select the top_n
+            counts = series.value_counts(sort=False).nlargest(top_n)
         else:
             st.error(f"Unsupported data type: {type(series)}")
             return None, pd.DataFrame()
@@ -37,7 +81,7 @@ def create_modern_pareto_chart(series, title, xaxis_title, top_n=20):
         
         # Create DataFrame safely
         pareto_df = pd.DataFrame({
-            'category': counts.index.astype(str),  # Ensure string type
+            'category': counts.index,  # kept as-is: the x-axis is typed 'category', so no str conversion
             'count': pd.to_numeric(counts.values, errors='coerce')  # Ensure numeric
         }).reset_index(drop=True)
         
@@ -60,53 +104,14 @@ def create_modern_pareto_chart(series, title, xaxis_title, top_n=20):
         pareto_df['percentage'] = (pareto_df['count'] / total_count * 100).round(1)
         pareto_df['cumulative_percentage'] = pareto_df['percentage'].cumsum().round(1)
         
-        # Create chart
-        fig = make_subplots(specs=[[{"secondary_y": True}]])
-        
-        # Bar chart - defects count
-        fig.add_trace(
-            go.Bar(
-                x=pareto_df['category'],
-                y=pareto_df['count'],
-                name='Defect Count',
-                marker_color=PALETTE['primary'],
-                opacity=0.8,
-                hovertemplate='<b>%{x}</b><br>Count: %{y}<extra></extra>'
-            ),
-            secondary_y=False,
-        )
-        
-        # Line chart - cumulative percentage
-        fig.add_trace(
-            go.Scatter(
-                x=pareto_df['category'],
-                y=pareto_df['cumulative_percentage'],
-                name='Cumulative %',
-                line=dict(color=PALETTE['danger'], width=3),
-                marker=dict(size=8, symbol='circle'),
-                hovertemplate='<b>%{x}</b><br>Cumulative: %{y}%<extra></extra>'
-            ),
-            secondary_y=True,
-        )
-        
-        # Update layout for modern look
-        fig.update_layout(
-            title={'text': title, 'x': 0.5, 'xanchor': 'center', 'font': {'size': 20}},
-            xaxis_title=xaxis_title,
-            template='plotly_white',
-            height=500,
-            showlegend=True,
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
-            font=dict(family="Arial, sans-serif", size=12),
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            margin=dict(t=80, l=60, r=60, b=80)
-        )
-        
-        # Update axes
-        fig.update_xaxes(tickangle=45, showgrid=False, tickfont=dict(size=11))
-        fig.update_yaxes(title_text="Defect Count", secondary_y=False)
-        fig.update_yaxes(title_text="Cumulative %", secondary_y=True, range=[0, 100])
+        # figure is built/serialized once per distinct (title, data) and rehydrated on reruns
+        fig = pio.from_json(_pareto_figure_json(
+            title,
+            xaxis_title,
+            tuple(pareto_df['category']),
+            tuple(pareto_df['count'].tolist()),
+            tuple(pareto_df['cumulative_percentage'].tolist()),
+        ))
         
         return fig, pareto_df
         
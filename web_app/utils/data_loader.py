@@ -1,8 +1,42 @@
+import numpy as np
 import pandas as pd
 import streamlit as st
 from sqlalchemy import text
+from sqlalchemy.engine import Engine
 
-def load_data(engine, days=None, table="quality.clean_quality_data", date_col="date"):
+from .db_utils import engine_cache_key, read_sql
+
+def today_utc() -> pd.Timestamp:
+    """Today's UTC midnight as a tz-naive Timestamp; computed per call, so it rolls over exactly at midnight."""
+    return pd.Timestamp.now(tz="UTC").tz_localize(None).normalize()
+
+# Arrow-backed strings (compiled .str kernels) when pyarrow is available; it ships with streamlit
+try:
+    import pyarrow  # noqa: F401
+    _STRING_DTYPE = "string[pyarrow]"
+except Exception:
+    _STRING_DTYPE = "string"
+
+
+def _remap_categories(cat: pd.Series, new_values: pd.Series) -> pd.Categorical:
+    """
+    Categorical whose value is new_values[i] wherever cat holds category i.
+    new_values is aligned with cat's categories and may repeat values (categories merge).
+    """
+    new_codes, new_cats = pd.factorize(new_values)
+    codes = cat.cat.codes.to_numpy()
+    return pd.Categorical.from_codes(np.where(codes >= 0, new_codes[codes], -1), categories=new_cats)
+
+# rows per fetch when load_data streams through pandas.read_sql
+LOAD_CHUNKSIZE = 50_000
+
+# columns load_data selects when the caller does not narrow them
+DEFAULT_COLUMNS = (
+    "id", "part_number", "serial_number", "date", "shift", "disposition",
+    "code_description", "category", "type", "load_date", "load_timestamp",
+)
+
+def load_data(engine, days=None, table="quality.clean_quality_data", date_col="date", start=None, end=None, columns=None):
     """
     Load and clean quality data from the database and return a DataFrame with:
       - date_col as a timezone-naive pd.Timestamp (dtype datetime64[ns])
@@ -13,42 +47,63 @@ def load_data(engine, days=None, table="quality.clean_quality_data", date_col="d
       days     : optional number of days of history to return (int)
       table    : table name (optionally schema-qualified)
       date_col : name of the datetime column in the table (default "date")
+      start    : optional first day to return (inclusive, date-like)
+      end      : optional last day to return (inclusive, date-like)
+      columns  : optional tuple of columns to select (default DEFAULT_COLUMNS); date_col is always added
     Notes:
-      - Attempts a DB-side cutoff when `days` is provided; falls back to reading the table
-        and applying a client-side cutoff if the DB query fails.
+      - Attempts a DB-side cutoff when `days`/`start`/`end` are provided; falls back to reading
+        the table and applying a client-side cutoff if the DB query fails.
       - Returns an empty DataFrame if the table cannot be read or if no valid dates remain.
+      - Cached for 5 minutes per (engine URL, days, table, date_col, start, end, columns) and, when
+        `days` is given, the current UTC day; widget reruns reuse it.
     """
     if engine is None:
         raise ValueError("engine is required")
+    # today keys the cache: a frame cut off at yesterday's date is never served after midnight
+    today = today_utc() if days is not None else None
+    return _load_data_cached(engine, days, table, date_col, start, end, columns, today)
+
+
+@st.cache_data(ttl=300, show_spinner=False, hash_funcs={Engine: engine_cache_key})
+def _load_data_cached(engine, days, table, date_col, start, end, columns, today):
+    """Cached body of load_data; `today` anchors the `days` cutoff."""
 
     df = None
     params = {}
 
-    # Build the base SELECT (only pull columns commonly needed; adjust if you need more)
-    select_cols = "id, part_number, serial_number, date, shift, disposition, code_description, category, type, load_date, load_timestamp"
+    # Build the base SELECT: only the requested columns cross the wire
+    cols = list(columns or DEFAULT_COLUMNS)
+    if date_col not in cols:
+        cols.insert(0, date_col)
+    select_cols = ", ".join(cols)
     # Attempt DB-side cutoff using a parameterized timestamp (works across many dialects)
     try:
+        clauses = [f"{date_col} IS NOT NULL"]
         if days is not None:
-            cutoff_ts = pd.Timestamp.utcnow().floor("D") - pd.Timedelta(days=int(days))
+            cutoff_ts = today - pd.Timedelta(days=int(days))
             # Use ISO format (tz-naive UTC) for passing to DB
             params["cutoff"] = cutoff_ts.isoformat()
-            sql = text(f"""
-                SELECT {select_cols}
-                FROM {table}
-                WHERE {date_col} IS NOT NULL
-                  AND {date_col} >= :cutoff
-                ORDER BY {date_col} DESC
-            """)
-        else:
-            sql = text(f"""
-                SELECT {select_cols}
-                FROM {table}
-                WHERE {date_col} IS NOT NULL
-                ORDER BY {date_col} DESC
-            """)
-
-        with engine.connect() as conn:
-            df = pd.read_sql(sql, conn, params=params if params else None)
+            clauses.append(f"{date_col} >= :cutoff")
+        # explicit day bounds: half-open [start, end + 1 day) so the whole last day is included
+        if start is not None:
+            params["start"] = pd.Timestamp(start).normalize().isoformat()
+            clauses.append(f"{date_col} >= :start")
+        if end is not None:
+            params["end"] = (pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).isoformat()
+            clauses.append(f"{date_col} < :end")
+        sql = text(f"""
+            SELECT {select_cols}
+            FROM {table}
+            WHERE {" AND ".join(clauses)}
+            ORDER BY {date_col} DESC
+        """)
+
+        # columnar connectorx fetch when installed (pandas.read_sql otherwise); the date column
+        # comes back as datetime64 so clean_quality_data's to_datetime is a no-op on it.
+        # On the pandas path chunksize streams rows through a server-side cursor, so the driver
+        # never buffers the whole result; cleaning runs once on the assembled frame so the
+        # categorical columns share one set of categories.
+        df = read_sql(sql, engine, params=params if params else None, parse_dates=[date_col], chunksize=LOAD_CHUNKSIZE)
     except Exception:
         # DB-side filter/query failed — fall back to reading the table and filtering in pandas
         try:
@@ -56,7 +111,7 @@ def load_data(engine, days=None, table="quality.clean_quality_data", date_col="d
                 schema, tbl = table.split(".", 1)
             else:
                 schema, tbl = None, table
-            df = pd.read_sql_table(tbl, con=engine, schema=schema)
+            df = pd.read_sql_table(tbl, con=engine, schema=schema, columns=cols)
         except Exception as e:
             st.error(f"Unable to read table {table} from DB: {e}")
             return pd.DataFrame()
@@ -65,21 +120,33 @@ def load_data(engine, days=None, table="quality.clean_quality_data", date_col="d
         return pd.DataFrame()
 
     # Pass through cleaning & normalization
-    return clean_quality_data(df, date_col=date_col, days=days)
+    # the fetched frame is ours alone: clean it in place instead of copying it first
+    return clean_quality_data(df, date_col=date_col, days=days, start=start, end=end, copy=False, today=today)
 
 
-def clean_quality_data(df, date_col="date", days=None):
+def clean_quality_data(df, date_col="date", days=None, start=None, end=None, copy=True, today=None):
     """
     Clean and standardize quality data.
     - Coerce date columns to tz-naive datetime64[ns]
     - Create date_day (date floored to midnight) for grouping/filtering
     - Standardize text columns and create disposition_norm
-    - Apply client-side cutoff if days is provided (defensive)
+    - Apply client-side cutoff if days/start/end are provided (defensive)
+    With copy=False the input frame may be modified in place (saves a full copy of the data).
+    today anchors the days cutoff (defaults to today_utc()).
     """
-    df = df.copy()
+    if copy:
+        df = df.copy()
 
-    # Parse datetimes defensively
-    df[date_col] = pd.to_datetime(df.get(date_col), errors="coerce")
+    if date_col not in df.columns:
+        return pd.DataFrame()
+
+    # Parse the main date once (skipped when the fetch already returned datetime64). Strings are
+    # parsed as UTC, so tz-aware values (even mixed offsets) are converted and naive ones kept as-is.
+    if not pd.api.types.is_datetime64_any_dtype(df[date_col]):
+        df[date_col] = pd.to_datetime(df[date_col], errors="coerce", utc=True)
+    # Ensure timezone-naive (convert to UTC, then drop tz info)
+    if getattr(df[date_col].dt, "tz", None) is not None:
+        df[date_col] = df[date_col].dt.tz_convert("UTC").dt.tz_localize(None)
     if "load_timestamp" in df.columns:
         df["load_timestamp"] = pd.to_datetime(df["load_timestamp"], errors="coerce")
 
@@ -88,47 +155,30 @@ def clean_quality_data(df, date_col="date", days=None):
     if df.empty:
         return pd.DataFrame()
 
-    # Ensure timezone-naive (drop tz info). Try safe conversion/dropping.
-    try:
-        # If tz-aware, convert to UTC then drop tz info
-        if getattr(df[date_col].dt, "tz", None) is not None:
-            df[date_col] = df[date_col].dt.tz_convert("UTC").dt.tz_localize(None)
-    except Exception:
-        # If above fails, try tz_localize(None) which will drop tz on some Series types
-        try:
-            df[date_col] = df[date_col].dt.tz_localize(None)
-        except Exception:
-            # Last resort: coerce again (will drop tz info from string representations)
-            df[date_col] = pd.to_datetime(df[date_col].astype(str), errors="coerce")
-
-    # Re-drop any rows that couldn't be coerced
-    df = df.dropna(subset=[date_col])
-    if df.empty:
-        return pd.DataFrame()
-
-    # Ensure dtype is datetime64[ns]
-    df[date_col] = pd.to_datetime(df[date_col], errors="coerce")
-    df = df.dropna(subset=[date_col])
-    if df.empty:
-        return pd.DataFrame()
-
     # Add helper column date_day (midnight, tz-naive)
     df["date_day"] = df[date_col].dt.floor("D")
 
     # Client-side cutoff as extra safety if days provided and DB-side cutoff failed
     if days is not None:
         try:
-            cutoff = pd.Timestamp.utcnow().floor("D") - pd.Timedelta(days=int(days))
+            cutoff = (today if today is not None else today_utc()) - pd.Timedelta(days=int(days))
             df = df[df[date_col] >= cutoff]
         except Exception:
             # ignore cutoff failure, return normalized df
             pass
-
-    # Standardize text fields
-    text_columns = ['shift', 'disposition', 'part_number', 'code_description']
-    for col in text_columns:
+    if start is not None:
+        df = df[df["date_day"] >= pd.Timestamp(start).normalize()]
+    if end is not None:
+        df = df[df["date_day"] <= pd.Timestamp(end).normalize()]
+
+    # Standardize text fields. The low-cardinality keys become categoricals (int codes for equality
+    # tests/groupbys, far less memory) and strip/upper runs on their few categories, not on every row.
+    for col in ('shift', 'disposition', 'part_number'):
         if col in df.columns:
-            df[col] = df[col].astype("string").str.strip().str.upper()
+            cat = df[col].astype("category")
+            df[col] = _remap_categories(cat, cat.cat.categories.to_series().astype(str).str.strip().str.upper())
+    if "code_description" in df.columns:
+        df["code_description"] = df["code_description"].astype(_STRING_DTYPE).str.strip().str.upper()
 
     # Normalize disposition values with a fallback to original normalized uppercase value
     disposition_map = {
@@ -137,7 +187,10 @@ def clean_quality_data(df, date_col="date", days=None):
         'OK': 'OK', 'PASS': 'OK', 'USE AS IS': 'OK'
     }
     if "disposition" in df.columns:
-        df["disposition_norm"] = df["disposition"].map(disposition_map).fillna(df["disposition"])
+        # map the (few) categories, then remap the codes: disposition_norm stays categorical
+        disp = df["disposition"]
+        cats = disp.cat.categories.to_series()
+        df["disposition_norm"] = _remap_categories(disp, cats.map(disposition_map).fillna(cats))
     else:
         df["disposition_norm"] = pd.NA
 
@@ -1,19 +1,69 @@
-import yaml
-from sqlalchemy import create_engine
-import os
-
-def load_db_config():
-    """Load YAML config."""
-    config_path = os.path.join(os.path.dirname(__file__), "../config/database.yaml")
-    with open(config_path, "r") as f:
-        return yaml.safe_load(f)
-
-def get_target_engine():
-    """Create SQLAlchemy engine for target_db."""
-    cfg = load_db_config()["target_db"]
-    connection_url = (
-        f"postgresql+psycopg2://{cfg['user']}:{cfg['password']}"
-        f"@{cfg['host']}:{cfg['port']}/{cfg['dbname']}"
-    )
-    engine = create_engine(connection_url)
-    return engine
+import pandas as pd
+import streamlit as st
+from sqlalchemy import text
+
+# Optional Arrow-native fetch path (falls back to pandas.read_sql when missing)
+try:
+    import connectorx as cx
+    HAS_CONNECTORX = True
+except Exception:
+    cx = None
+    HAS_CONNECTORX = False
+
+@st.cache_resource(show_spinner=False)
+def get_dashboard_engine():
+    """
+    The dashboard's only engine factory: one pooled target engine shared by every page, rerun,
+    session and read_sql call of this server process,
+    so queries reuse pooled connections instead of reconnecting on each rerun.
+    pool_pre_ping replaces dead pooled connections transparently; pool_recycle retires
+    connections before server/firewall idle timeouts drop them.
+    """
+    from etl.utils.db_utils import get_target_engine as get_etl_target_engine
+    return get_etl_target_engine(pool_size=5, max_overflow=5, pool_pre_ping=True, pool_recycle=1800)
+
+
+def engine_cache_key(engine) -> str:
+    """Password-free engine URL, used as the hash for engines passed to st.cache_data functions."""
+    url = getattr(engine, "url", None)
+    return url.render_as_string(hide_password=True) if url is not None else repr(engine)
+
+
+def _connectorx_url(engine) -> str:
+    """Driver-less URL (postgresql://...) in the form connectorx expects."""
+    return engine.url.set(drivername=engine.url.get_backend_name()).render_as_string(hide_password=False)
+
+
+def read_sql(query, engine=None, params=None, chunksize=None, parse_dates=None, partition_on=None, partition_num=4) -> pd.DataFrame:
+    """
+    Run a SELECT and return a DataFrame.
+    Uses connectorx (columnar fetch, no DB-API row loop) when installed; bind params are
+    rendered as literals for it. Falls back to pandas.read_sql on any connectorx failure.
+    With chunksize, the pandas path streams rows through a server-side cursor
+    (stream_results=True) so the driver never buffers the whole result.
+    parse_dates columns come back as datetime64 (DATE columns are converted by the driver).
+    partition_on (numeric column) splits the connectorx fetch into partition_num parallel range queries.
+    engine defaults to the shared get_dashboard_engine().
+    """
+    if engine is None:
+        engine = get_dashboard_engine()
+    sql = text(query) if isinstance(query, str) else query
+    if HAS_CONNECTORX and hasattr(engine, "url"):
+        try:
+            if params:
+                sql_str = str(sql.bindparams(**params).compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+            else:
+                sql_str = str(sql.compile(dialect=engine.dialect))
+            kwargs = {"partition_on": partition_on, "partition_num": partition_num} if partition_on else {}
+            df = cx.read_sql(_connectorx_url(engine), sql_str, return_type="pandas", protocol="binary", **kwargs)
+            for col in parse_dates or []:
+                if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+                    df[col] = pd.to_datetime(df[col])
+            return df
+        except Exception:
+            pass
+    if chunksize:
+        with engine.connect().execution_options(stream_results=True) as conn:
+            chunks = list(pd.read_sql(sql, conn, params=params, chunksize=chunksize, parse_dates=parse_dates))
+        return pd.concat(chunks, ignore_index=True, copy=False) if chunks else pd.DataFrame()
+    return pd.read_sql(sql, engine, params=params, parse_dates=parse_dates)
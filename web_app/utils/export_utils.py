@@ -0,0 +1,58 @@
+import io
+import os
+import time
+
+import pandas as pd
+
+# Optional C-level CSV writer (pyarrow ships with streamlit); falls back to pandas.to_csv
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    HAS_PYARROW = True
+except Exception:
+    pa = None
+    pacsv = None
+    HAS_PYARROW = False
+
+
+def to_csv_bytes(df: pd.DataFrame) -> bytes:
+    """
+    Serialize df (without index) to UTF-8 CSV bytes for st.download_button.
+    pyarrow writes straight into a BytesIO; pandas (str then encode) is the fallback.
+    """
+    if HAS_PYARROW:
+        try:
+            buf = io.BytesIO()
+            pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), buf)
+            return buf.getvalue()
+        except Exception:
+            pass
+    return df.to_csv(index=False).encode("utf-8")
+
+
+def read_parquet_cache(path: str, max_age_s: float) -> pd.DataFrame | None:
+    """
+    Return the frame stored at path if it was written less than max_age_s ago, else None.
+    Columns come back with their stored dtypes (datetime, category, string[pyarrow]), no re-parse.
+    """
+    if not HAS_PYARROW:
+        return None
+    try:
+        if time.time() - os.path.getmtime(path) > max_age_s:
+            return None
+        return pd.read_parquet(path, engine="pyarrow")
+    except Exception:
+        return None
+
+
+def write_parquet_cache(df: pd.DataFrame, path: str) -> None:
+    """Best-effort zstd Parquet snapshot of df; written to a temp file and swapped in atomically."""
+    if not HAS_PYARROW:
+        return
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        df.to_parquet(tmp, engine="pyarrow", compression="zstd", index=False)
+        os.replace(tmp, path)
+    except Exception:
+        pass
@@ -1,9 +1,86 @@
+import numpy as np
 import pandas as pd
+import streamlit as st
 from typing import Optional
+from sqlalchemy.engine import Engine
+
+from .db_utils import engine_cache_key
+
+# Optional vectorized SQL engine for the in-memory (DataFrame) branches; falls back to pandas
+try:
+    import duckdb
+    HAS_DUCKDB = True
+except Exception:
+    duckdb = None
+    HAS_DUCKDB = False
+
+# Loaders are cached for 5 minutes per engine URL (or DataFrame contents) and date parameters;
+# DB errors raise and are therefore never cached.
+_cache_loader = st.cache_data(ttl=300, show_spinner=False, hash_funcs={Engine: engine_cache_key})
+
+# nanoseconds per day (datetime64[ns] -> whole days since epoch)
+_DAY_NS = 86_400_000_000_000
+
+# rows per server-side cursor fetch for unbounded load_part_records queries
+PART_RECORDS_FETCH = 1000
 
 def _is_dataframe(obj) -> bool:
     return isinstance(obj, pd.DataFrame)
 
+def _safe_rate(scrap: pd.Series, total: pd.Series) -> np.ndarray:
+    """Element-wise scrap / total as float64, 0.0 where total is 0 (one vectorized divide, no row loop)."""
+    sc = scrap.to_numpy(dtype=np.float64)
+    tc = total.to_numpy(dtype=np.float64)
+    return np.divide(sc, tc, out=np.zeros_like(sc), where=tc > 0)
+
+def _duckdb_df(raw: pd.DataFrame, query: str, params: dict) -> pd.DataFrame:
+    """Run query against raw (registered as the view `raw`, read zero-copy) on a private in-memory DuckDB connection."""
+    con = duckdb.connect()
+    try:
+        con.register('raw', raw)
+        return con.execute(query, params).df()
+    finally:
+        con.close()
+
+def _ts(value):
+    """Date-like -> python datetime for DuckDB bind parameters."""
+    return pd.to_datetime(value).to_pydatetime()
+
+# Same COUNT(*) FILTER shape as the Postgres queries below; TRY_CAST mirrors pd.to_datetime(errors='coerce')
+_DUCKDB_AGG_BY_PART = """
+WITH r AS (
+    SELECT part_number, CAST(disposition AS VARCHAR) AS disposition, TRY_CAST("date" AS TIMESTAMP) AS d
+    FROM raw
+    WHERE part_number IS NOT NULL
+)
+SELECT part_number,
+       COUNT(*) FILTER (WHERE d BETWEEN $curr_start AND $curr_end) AS total_curr,
+       COUNT(*) FILTER (WHERE d BETWEEN $curr_start AND $curr_end AND disposition = 'SCRAP') AS scrap_curr,
+       COUNT(*) FILTER (WHERE d BETWEEN $prior_start AND $prior_end) AS total_prior,
+       COUNT(*) FILTER (WHERE d BETWEEN $prior_start AND $prior_end AND disposition = 'SCRAP') AS scrap_prior
+FROM r
+WHERE d BETWEEN $prior_start AND $curr_end
+GROUP BY part_number
+HAVING COUNT(*) FILTER (WHERE d BETWEEN $curr_start AND $curr_end) > 0
+ORDER BY part_number
+"""
+
+_DUCKDB_AGG_BY_DAY = """
+WITH r AS (
+    SELECT CAST(disposition AS VARCHAR) AS disposition, date_trunc('day', TRY_CAST("date" AS TIMESTAMP)) AS d
+    FROM raw
+)
+SELECT d AS date,
+       COUNT(*) AS defect_count,
+       COUNT(*) FILTER (WHERE disposition = 'SCRAP') AS scrap_count,
+       COUNT(*) FILTER (WHERE disposition = 'REPAIRED') AS repaired_count
+FROM r
+WHERE d BETWEEN $start_date AND $end_date
+GROUP BY d
+ORDER BY d
+"""
+
+@_cache_loader
 def load_agg_by_part(engine_or_df, curr_start, curr_end, prior_start, prior_end) -> pd.DataFrame:
     """
     Load per-part aggregated counts for current and prior windows.
@@ -15,43 +92,62 @@ def load_agg_by_part(engine_or_df, curr_start, curr_end, prior_start, prior_end)
     """
     # If user passed a DataFrame, compute aggregates in-memory
     if _is_dataframe(engine_or_df):
-        raw = engine_or_df.copy()
-        if 'date' not in raw.columns:
+        if 'date' not in engine_or_df.columns:
             return pd.DataFrame()
-        raw['date'] = pd.to_datetime(raw['date'], errors='coerce')
-        mask = (raw['date'] >= pd.to_datetime(prior_start)) & (raw['date'] <= pd.to_datetime(curr_end))
-        raw = raw.loc[mask].dropna(subset=['date'])
-        if raw.empty:
+        if HAS_DUCKDB:
+            try:
+                merged = _duckdb_df(engine_or_df, _DUCKDB_AGG_BY_PART, {
+                    "curr_start": _ts(curr_start), "curr_end": _ts(curr_end),
+                    "prior_start": _ts(prior_start), "prior_end": _ts(prior_end),
+                })
+                if merged.empty:
+                    return pd.DataFrame()
+                for c in ['total_curr', 'scrap_curr', 'total_prior', 'scrap_prior']:
+                    merged[c] = merged[c].astype(int)
+                merged['rate_curr'] = _safe_rate(merged['scrap_curr'], merged['total_curr'])
+                merged['rate_prior'] = _safe_rate(merged['scrap_prior'], merged['total_prior'])
+                return merged
+            except Exception:
+                pass
+        # read-only: no frame copy and no [prior_start, curr_end] pre-filter; NaT and out-of-range
+        # rows are simply False in both window masks
+        raw = engine_or_df
+        dates = pd.to_datetime(raw['date'], errors='coerce')
+        in_curr = ((dates >= pd.to_datetime(curr_start)) & (dates <= pd.to_datetime(curr_end))).to_numpy()
+        if not in_curr.any():
             return pd.DataFrame()
-        # current
-        curr_mask = (raw['date'] >= pd.to_datetime(curr_start)) & (raw['date'] <= pd.to_datetime(curr_end))
-        prior_mask = (raw['date'] >= pd.to_datetime(prior_start)) & (raw['date'] <= pd.to_datetime(prior_end))
-        curr = raw.loc[curr_mask].groupby('part_number').agg(
-            total_curr=('part_number', 'size'),
-            scrap_curr=('disposition', lambda s: (s == 'SCRAP').sum())
-        ).reset_index()
-        prior = raw.loc[prior_mask].groupby('part_number').agg(
-            total_prior=('part_number', 'size'),
-            scrap_prior=('disposition', lambda s: (s == 'SCRAP').sum())
-        ).reset_index()
-        merged = curr.merge(prior, on='part_number', how='left').fillna(0)
-        # ensure ints
+        in_prior = ((dates >= pd.to_datetime(prior_start)) & (dates <= pd.to_datetime(prior_end))).to_numpy()
+        # one factorize of the part keys, then all four aggregates as weighted bincounts over the
+        # codes (compiled counting loops, no groupby machinery); sort=True keeps part_number order
+        codes, parts = pd.factorize(raw['part_number'], sort=True)
+        keep = codes >= 0
+        codes = codes[keep]
+        in_curr = in_curr[keep]
+        in_prior = in_prior[keep]
+        is_scrap = (raw['disposition'] == 'SCRAP').to_numpy(dtype=bool, na_value=False)[keep]
+        n_parts = len(parts)
+        merged = pd.DataFrame({
+            'part_number': parts,
+            'total_curr': np.bincount(codes, weights=in_curr, minlength=n_parts),
+            'scrap_curr': np.bincount(codes, weights=in_curr & is_scrap, minlength=n_parts),
+            'total_prior': np.bincount(codes, weights=in_prior, minlength=n_parts),
+            'scrap_prior': np.bincount(codes, weights=in_prior & is_scrap, minlength=n_parts),
+        })
+        # parts with current-window rows only (prior counts default to 0), as before
+        merged = merged[merged['total_curr'] > 0].reset_index(drop=True)
         for c in ['total_curr', 'scrap_curr', 'total_prior', 'scrap_prior']:
-            if c in merged.columns:
-                merged[c] = merged[c].astype(int)
-            else:
-                merged[c] = 0
-        merged['rate_curr'] = merged.apply(lambda r: (r['scrap_curr'] / r['total_curr']) if r['total_curr'] > 0 else 0.0, axis=1)
-        merged['rate_prior'] = merged.apply(lambda r: (r['scrap_prior'] / r['total_prior']) if r['total_prior'] > 0 else 0.0, axis=1)
+            merged[c] = merged[c].astype(int)
+        merged['rate_curr'] = _safe_rate(merged['scrap_curr'], merged['total_curr'])
+        merged['rate_prior'] = _safe_rate(merged['scrap_prior'], merged['total_prior'])
         return merged
 
     # Otherwise, assume engine_or_df is a DB connection / SQLAlchemy engine
     query = """
     SELECT part_number,
-       SUM(CASE WHEN date BETWEEN %(curr_start)s AND %(curr_end)s THEN 1 ELSE 0 END) AS total_curr,
-       SUM(CASE WHEN date BETWEEN %(curr_start)s AND %(curr_end)s AND disposition = 'SCRAP' THEN 1 ELSE 0 END) AS scrap_curr,
-       SUM(CASE WHEN date BETWEEN %(prior_start)s AND %(prior_end)s THEN 1 ELSE 0 END) AS total_prior,
-       SUM(CASE WHEN date BETWEEN %(prior_start)s AND %(prior_end)s AND disposition = 'SCRAP' THEN 1 ELSE 0 END) AS scrap_prior
+       COUNT(*) FILTER (WHERE date BETWEEN %(curr_start)s AND %(curr_end)s) AS total_curr,
+       COUNT(*) FILTER (WHERE date BETWEEN %(curr_start)s AND %(curr_end)s AND disposition = 'SCRAP') AS scrap_curr,
+       COUNT(*) FILTER (WHERE date BETWEEN %(prior_start)s AND %(prior_end)s) AS total_prior,
+       COUNT(*) FILTER (WHERE date BETWEEN %(prior_start)s AND %(prior_end)s AND disposition = 'SCRAP') AS scrap_prior
     FROM quality.clean_quality_data
     WHERE date BETWEEN %(prior_start)s AND %(curr_end)s
     GROUP BY part_number
@@ -75,10 +171,11 @@ def load_agg_by_part(engine_or_df, curr_start, curr_end, prior_start, prior_end)
     df['scrap_curr'] = df['scrap_curr'].astype(int)
     df['total_prior'] = df['total_prior'].astype(int)
     df['scrap_prior'] = df['scrap_prior'].astype(int)
-    df['rate_curr'] = df.apply(lambda r: (r['scrap_curr'] / r['total_curr']) if r['total_curr'] > 0 else 0.0, axis=1)
-    df['rate_prior'] = df.apply(lambda r: (r['scrap_prior'] / r['total_prior']) if r['total_prior'] > 0 else 0.0, axis=1)
+    df['rate_curr'] = _safe_rate(df['scrap_curr'], df['total_curr'])
+    df['rate_prior'] = _safe_rate(df['scrap_prior'], df['total_prior'])
     return df
 
+@_cache_loader
 def load_agg_by_day(engine_or_df, start_date, end_date) -> pd.DataFrame:
     """
     Load daily aggregated counts for trend charts.
@@ -86,30 +183,58 @@ def load_agg_by_day(engine_or_df, start_date, end_date) -> pd.DataFrame:
     Returns DataFrame with date(normalized), defect_count, scrap_count, repaired_count
     """
     if _is_dataframe(engine_or_df):
-        raw = engine_or_df.copy()
-        if 'date' not in raw.columns:
+        if 'date' not in engine_or_df.columns:
             return pd.DataFrame()
-        raw['date'] = pd.to_datetime(raw['date'], errors='coerce').dt.normalize()
-        mask = (raw['date'] >= pd.to_datetime(start_date)) & (raw['date'] <= pd.to_datetime(end_date))
-        raw = raw.loc[mask].dropna(subset=['date'])
-        if raw.empty:
+        if HAS_DUCKDB:
+            try:
+                daily = _duckdb_df(engine_or_df, _DUCKDB_AGG_BY_DAY, {
+                    "start_date": _ts(start_date), "end_date": _ts(end_date),
+                })
+                if daily.empty:
+                    return pd.DataFrame()
+                daily['date'] = daily['date'].astype('datetime64[ns]')
+                for c in ['defect_count', 'scrap_count', 'repaired_count']:
+                    daily[c] = daily[c].astype(int)
+                return daily
+            except Exception:
+                pass
+        # days since epoch as plain integers (no normalize()/datetime hashing, no frame copy); the
+        # inclusive [start_date, end_date] bounds become an integer day range [lo, hi]
+        dates = pd.to_datetime(engine_or_df['date'], errors='coerce')
+        day = dates.to_numpy('datetime64[ns]').view('i8') // _DAY_NS
+        lo = -(-pd.to_datetime(start_date).value // _DAY_NS)
+        hi = pd.to_datetime(end_date).value // _DAY_NS
+        mask = dates.notna().to_numpy() & (day >= lo) & (day <= hi)
+        if not mask.any():
             return pd.DataFrame()
-        daily = raw.groupby('date').agg(
-            defect_count=('part_number', 'size'),
-            scrap_count=('disposition', lambda s: (s == 'SCRAP').sum()),
-            repaired_count=('disposition', lambda s: (s == 'REPAIRED').sum())
-        ).reset_index().sort_values('date')
+        # int32 offsets into the window, counted with (weighted) bincounts; days with no rows dropped
+        offset = (day[mask] - lo).astype(np.int32)
+        disposition = engine_or_df['disposition']
+        is_scrap = (disposition == 'SCRAP').to_numpy(dtype=bool, na_value=False)[mask]
+        is_repaired = (disposition == 'REPAIRED').to_numpy(dtype=bool, na_value=False)[mask]
+        n_days = int(hi - lo) + 1
+        defect_count = np.bincount(offset, minlength=n_days)
+        present = np.flatnonzero(defect_count)
+        daily = pd.DataFrame({
+            # back to datetime64[ns] only for the (small) per-day result
+            'date': ((present + lo) * _DAY_NS).astype('datetime64[ns]'),
+            'defect_count': defect_count[present].astype(int),
+            'scrap_count': np.bincount(offset, weights=is_scrap, minlength=n_days)[present].astype(int),
+            'repaired_count': np.bincount(offset, weights=is_repaired, minlength=n_days)[present].astype(int),
+        })
         return daily
 
+    # clean_quality_data.date is a DATE column: group on it directly (no per-row cast), and the
+    # (date) INCLUDE (disposition) index from init_database serves this as an index-only range scan
     query = """
-    SELECT date::date as date,
+    SELECT date,
            COUNT(*) AS defect_count,
-           SUM(CASE WHEN disposition = 'SCRAP' THEN 1 ELSE 0 END) AS scrap_count,
-           SUM(CASE WHEN disposition = 'REPAIRED' THEN 1 ELSE 0 END) AS repaired_count
+           COUNT(*) FILTER (WHERE disposition = 'SCRAP') AS scrap_count,
+           COUNT(*) FILTER (WHERE disposition = 'REPAIRED') AS repaired_count
     FROM quality.clean_quality_data
     WHERE date BETWEEN %(start_date)s AND %(end_date)s
-    GROUP BY date::date
-    ORDER BY date::date
+    GROUP BY date
+    ORDER BY date
     """
     params = {"start_date": pd.to_datetime(start_date), "end_date": pd.to_datetime(end_date)}
     try:
@@ -125,6 +250,7 @@ def load_agg_by_day(engine_or_df, start_date, end_date) -> pd.DataFrame:
     df['repaired_count'] = df['repaired_count'].astype(int)
     return df
 
+@_cache_loader
 def load_part_records(engine_or_df, part_number: str, start_date: Optional[pd.Timestamp]=None, end_date: Optional[pd.Timestamp]=None, limit: Optional[int]=None) -> pd.DataFrame:
     """
     Fetch raw rows for a single part. Works with DB engine or in-memory DataFrame.
@@ -153,7 +279,13 @@ def load_part_records(engine_or_df, part_number: str, start_date: Optional[pd.Ti
         base += " LIMIT %(limit)s"
         params["limit"] = int(limit)
     try:
-        df = pd.read_sql(base, con=engine_or_df, params=params)
+        if limit is None and hasattr(engine_or_df, "connect"):
+            # unbounded result: psycopg2 named (server-side) cursor, fetched PART_RECORDS_FETCH rows at a time
+            with engine_or_df.connect().execution_options(stream_results=True, yield_per=PART_RECORDS_FETCH) as conn:
+                chunks = list(pd.read_sql(base, con=conn, params=params, chunksize=PART_RECORDS_FETCH))
+            df = pd.concat(chunks, ignore_index=True, copy=False) if chunks else pd.DataFrame()
+        else:
+            df = pd.read_sql(base, con=engine_or_df, params=params)
     except Exception as e:
         raise RuntimeError(f"Unable to read part records from DB: {e}") from e
     return df
\ No newline at end of file